@@ -0,0 +1,245 @@
+"""
+Execution tier that runs agent turns in a pool of worker processes.
+
+The Streamlit script only submits a job and replays the callback events the worker
+sends back over a queue, so the Bedrock/tool loop of many conversations runs on all
+cores and independently of the thread that serves the UI.
+
+The pool size is read from AGENT_WORKERS (default: the number of CPUs).
+"""
+import concurrent.futures
+import multiprocessing
+import os
+import queue
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+from bedrock_scheduler import FairScheduler, QueueTimeout, ScheduledClient
+from claude_bedrock import THINKING_BUDGET_TOKENS
+from history_normalization import NormalizedWindowMemory, prompt_message
+from turn_budget import TurnBudget, TurnController
+
+WORKER_COUNT = int(os.environ.get("AGENT_WORKERS", os.cpu_count() or 1))
+
+# Callback methods forwarded from the worker to the handlers in the UI
+FORWARDED_EVENTS = ["on_chat_model_start", "on_llm_new_token", "on_llm_end", "on_tool_start", "on_tool_end", "on_tool_error", "on_agent_action", "on_agent_finish", "on_text", "on_custom_event"]
+
+
+@dataclass
+class AgentJob:
+    """Everything a worker process needs to run one turn; must be picklable."""
+    input: str
+    option: str
+    username: str = "Guest"
+    thinking_budget: int = THINKING_BUDGET_TOKENS
+    max_iterations: int = 25
+    history: List[Dict] = field(default_factory=list)
+    budget: Optional[TurnBudget] = None
+    tool_names: Optional[List[str]] = None  # bind only these tools, see tool_selection.py
+
+    @staticmethod
+    def serialize_history(messages: List[BaseMessage]) -> List[Dict]:
+        """The history as the prompt needs it, without stored reasoning."""
+        return messages_to_dict([prompt_message(message) for message in messages])
+
+
+class QueueCallbackHandler(BaseCallbackHandler):
+    """Puts callback events on a queue as (method, args, kwargs) tuples."""
+
+    def __init__(self, events):
+        self.events = events
+
+    def _put(self, method: str, *args, run_id=None, parent_run_id=None):
+        try:
+            self.events.put((method, args, {"run_id": run_id, "parent_run_id": parent_run_id}))
+        except Exception as e:  # an event that cannot be pickled must not fail the turn
+            print(f"Error forwarding {method}: {e}")
+
+    def on_chat_model_start(self, serialized: dict, messages: list, **kwargs):
+        self._put("on_chat_model_start", serialized, [], run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_llm_new_token(self, token, **kwargs):
+        self._put("on_llm_new_token", token, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_llm_end(self, response, **kwargs):
+        self._put("on_llm_end", response, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_tool_start(self, serialized: dict, input_str: str, **kwargs):
+        self._put("on_tool_start", serialized, input_str, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_tool_end(self, output, **kwargs):
+        self._put("on_tool_end", output, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_tool_error(self, error, **kwargs):
+        self._put("on_tool_error", RuntimeError(str(error)), run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_agent_action(self, action, **kwargs):
+        self._put("on_agent_action", action, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_agent_finish(self, finish, **kwargs):
+        self._put("on_agent_finish", finish, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_text(self, text: str, **kwargs):
+        self._put("on_text", text, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_custom_event(self, name: str, data, *, run_id, **kwargs):
+        self._put("on_custom_event", name, data, run_id=run_id)
+
+
+def replay_event(handlers: List[BaseCallbackHandler], method: str, args: tuple, kwargs: Dict):
+    """Call a forwarded event on the local handlers, like the callback manager would."""
+    for handler in handlers:
+        try:
+            getattr(handler, method)(*args, **kwargs)
+        except NotImplementedError:
+            if method == "on_chat_model_start":
+                handler.on_llm_start(args[0], [""], **kwargs)
+        except Exception as e:
+            print(f"Error in {type(handler).__name__}.{method}: {e}")
+
+
+class RemoteScheduler:
+    """Stands in for the FairScheduler of the UI process inside a worker process.
+
+    acquire and release are sent over the event queue and AgentWorkerPool.run calls the real
+    scheduler, so model calls of worker turns count against the same per-user and global limits.
+    """
+
+    def __init__(self, events, grants):
+        self.events = events
+        self.grants = grants
+
+    def acquire(self, user: str) -> float:
+        self.events.put(("scheduler_acquire", (user,), {}))
+        waited, error = self.grants.get()
+        if error:
+            raise QueueTimeout(error)
+        return waited
+
+    def release(self, user: str, tokens: int = 0):
+        self.events.put(("scheduler_release", (user, tokens), {}))
+
+
+_router = None
+
+
+def get_worker_router():
+    """One model router per worker process."""
+    global _router
+    if _router is None:
+        from model_router import ModelRouter
+        _router = ModelRouter()
+    return _router
+
+
+def run_agent_job(job: AgentJob, events, cancel_event=None, grants=None) -> str:
+    """Run one turn in a worker process, streaming callback events to the queue; returns the answer text.
+
+    The turn stops with a partial answer when ``cancel_event`` is set or the job budget runs out.
+    With a ``grants`` queue its model calls are admitted by the scheduler of the UI process.
+    """
+    from claude_bedrock import bedrock_client, get_agent_executor_chat_bedrock_converse, get_output_text
+    from model_router import MODEL_AUTO
+    from tool_selection import ALL_TOOLS, tools_named
+
+    memory = NormalizedWindowMemory(
+        chat_memory=ChatMessageHistory(messages=messages_from_dict(job.history)), return_messages=True, memory_key="chat_history", k=500
+    )
+    controller = TurnController(job.budget, cancel_event)
+    config = {"callbacks": [QueueCallbackHandler(events), controller]}  # the controller raises, so it goes last
+    selected_tools = tools_named(frozenset(job.tool_names)) if job.tool_names is not None else ALL_TOOLS
+
+    def build_agent_executor(option: str, model_id: str = None, client=None):
+        if grants is not None:
+            client = ScheduledClient(client or bedrock_client, RemoteScheduler(events, grants), job.username, on_wait=lambda seconds: events.put(("on_queue_wait", (seconds,), {})))
+        return get_agent_executor_chat_bedrock_converse(
+            option=option,
+            memory=memory,
+            max_iterations=job.max_iterations,
+            streaming=True,
+            thinking=job.thinking_budget > 0,
+            username=job.username,
+            model_id=model_id,
+            client=client,
+            thinking_budget=job.thinking_budget,
+            controller=controller,
+            tools=selected_tools,
+        )
+
+    if job.option == MODEL_AUTO:
+        result = get_worker_router().invoke(
+            job.input,
+            build_agent_executor,
+            {"input": job.input},
+            config=config,
+            on_attempt=lambda option, model_id, attempt: events.put(("on_attempt", (option, model_id, attempt), {})),
+        )
+    else:
+        result = build_agent_executor(job.option).invoke({"input": job.input}, config=config)
+    return get_output_text(result["output"])
+
+
+class AgentWorkerPool:
+    """Process pool serving agent jobs, with a manager queue per job for the streamed events."""
+
+    def __init__(self, max_workers: int = WORKER_COUNT):
+        context = multiprocessing.get_context("spawn")  # never fork the Streamlit server and its threads
+        self.manager = context.Manager()
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+    def run(self, job: AgentJob, handlers: List[BaseCallbackHandler], on_attempt: Optional[Callable[[str, str, int], None]] = None, controller: Optional[TurnController] = None, poll_interval: float = 0.05,
+            scheduler: Optional[FairScheduler] = None, on_queue_wait: Optional[Callable[[float], None]] = None) -> str:
+        """Submit a job and replay its events on the handlers in the calling thread until it is done.
+
+        Cancelling ``controller`` stops the job in the worker; so does leaving this method early,
+        e.g. when Streamlit interrupts the script run. With a ``scheduler`` the model calls of the
+        job wait for admission by it, like the calls of in-process turns.
+        """
+        events = self.manager.Queue()
+        cancel_event = self.manager.Event()
+        grants = self.manager.Queue() if scheduler is not None else None
+        held = 0  # scheduler slots acquired for the worker and not yet released
+        future = self.executor.submit(run_agent_job, job, events, cancel_event, grants)
+        try:
+            while True:
+                if controller is not None and controller.cancelled:
+                    cancel_event.set()
+                try:
+                    method, args, kwargs = events.get(timeout=poll_interval)
+                except queue.Empty:
+                    if future.done() and events.empty():
+                        break
+                    continue
+                if method == "on_attempt":
+                    if on_attempt:
+                        on_attempt(*args)
+                    continue
+                if method == "scheduler_acquire":
+                    try:
+                        grants.put((scheduler.acquire(*args), None))
+                        held += 1
+                    except QueueTimeout as e:
+                        grants.put((0.0, str(e)))
+                    continue
+                if method == "scheduler_release":
+                    scheduler.release(*args)
+                    held -= 1
+                    continue
+                if method == "on_queue_wait":
+                    if on_queue_wait:
+                        on_queue_wait(*args)
+                    continue
+                replay_event(handlers, method, args, kwargs)
+        finally:
+            if not future.done():
+                cancel_event.set()
+            for _ in range(held):  # calls the worker will not report, e.g. after leaving early
+                scheduler.release(job.username)
+        return future.result()
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+        self.manager.shutdown()
@@ -0,0 +1,92 @@
+"""
+Agent turns that run in a thread of the server process instead of the script thread.
+
+Streamlit interrupts a running script as soon as a widget is used, before the widget's
+callback runs, so a turn executed by the script itself cannot be stopped gracefully: it
+is killed halfway and nothing is saved. A BackgroundTurn runs in its own thread and puts
+its callback events on a queue that the script replays on its UI handlers. The Stop
+button cancels the controller of the turn, found by session id in the process-wide
+TurnRegistry, and the next script run waits for the turn to end, so the partial answer
+is in the history.
+"""
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from agent_worker import QueueCallbackHandler, replay_event
+from turn_budget import TurnController
+
+
+class BackgroundTurn:
+    """One turn running in a thread; ``target(turn)`` does the work and returns the answer text."""
+
+    def __init__(self, target: Callable[["BackgroundTurn"], str], controller: TurnController):
+        self.controller = controller
+        self.events = queue.Queue()
+        self.callback_handler = QueueCallbackHandler(self.events)
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self._target = target
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        try:
+            self.result = self._target(self)
+        except BaseException as e:
+            self.error = e
+
+    def post(self, fn: Callable, *args: Any):
+        """Call ``fn(*args)`` in the thread that replays the events, e.g. to update the UI."""
+        self.events.put(("call", (fn, *args), {}))
+
+    def is_alive(self) -> bool:
+        return self.thread.is_alive()
+
+    def wait(self, timeout: Optional[float] = None):
+        self.thread.join(timeout)
+
+    def replay(self, handlers: List[BaseCallbackHandler], poll_interval: float = 0.05) -> Optional[str]:
+        """Replay the events of the turn on the handlers in the calling thread until it is done; returns the answer."""
+        while True:
+            try:
+                method, args, kwargs = self.events.get(timeout=poll_interval)
+            except queue.Empty:
+                if not self.thread.is_alive() and self.events.empty():
+                    break
+                continue
+            if method == "call":
+                args[0](*args[1:])
+            else:
+                replay_event(handlers, method, args, kwargs)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class TurnRegistry:
+    """The running turn of each session, shared by all script runs of the server process."""
+
+    def __init__(self):
+        self._turns: Dict[str, BackgroundTurn] = {}
+        self._lock = threading.Lock()
+
+    def start(self, session_id: str, turn: BackgroundTurn) -> BackgroundTurn:
+        with self._lock:
+            for key in [key for key, running in self._turns.items() if not running.is_alive()]:
+                del self._turns[key]
+            self._turns[session_id] = turn
+        turn.thread.start()
+        return turn
+
+    def get(self, session_id: str) -> Optional[BackgroundTurn]:
+        """The turn of the session while it is running, else None."""
+        with self._lock:
+            turn = self._turns.get(session_id)
+        return turn if turn is not None and turn.is_alive() else None
+
+    def cancel(self, session_id: str):
+        turn = self.get(session_id)
+        if turn is not None:
+            turn.controller.cancel()
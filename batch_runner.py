@@ -0,0 +1,162 @@
+"""
+Headless batch runner: drives the agent over a JSONL file of prompts.
+
+Usage:
+    python batch_runner.py prompts.jsonl results.jsonl --concurrency 4
+
+Every input line is a JSON object with an id and a prompt. Results are appended to
+the output file as soon as they are available, one JSON object per line, together
+with per-item timing and token usage. The output file doubles as the checkpoint:
+items that already have a successful result are skipped when the run is restarted.
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Set
+
+from history_normalization import NormalizedWindowMemory
+from langchain_community.chat_message_histories import ChatMessageHistory
+from claude_bedrock import get_agent_executor_chat_bedrock_converse, get_output_text, AVAILABLE_MODELS, MODEL_SONNET_37, MODEL_PRICING
+from session_metrics_callback_handler import SessionMetricsCallbackHandler
+
+# disable warnings
+import warnings
+from langchain._api.deprecation import LangChainDeprecationWarning
+warnings.filterwarnings("ignore", category=LangChainDeprecationWarning)
+
+
+def read_prompts(path: str, id_field: str, prompt_field: str) -> Iterator[Dict]:
+    """Yield {"id", "prompt"} items from a JSONL file; the line number is the id when the field is missing."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            yield {"id": str(record.get(id_field, line_number)), "prompt": record[prompt_field]}
+
+
+def read_completed_ids(path: str) -> Set[str]:
+    """Return the ids that already have a successful result in the output file."""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a partially written line from an interrupted run
+            if record.get("status") == "ok":
+                completed.add(record["id"])
+    return completed
+
+
+def truncate_partial_line(path: str):
+    """Cut a partially written last line of an interrupted run, so the next record starts on a line of its own."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def run_item(item: Dict, option: str, thinking: bool, max_iterations: int, username: str) -> Dict:
+    """Run one prompt through a fresh agent with its own memory and return the result record."""
+    memory = NormalizedWindowMemory(
+        chat_memory=ChatMessageHistory(), return_messages=True, memory_key="chat_history", k=500
+    )
+    metrics_handler = SessionMetricsCallbackHandler(model=option, pricing=MODEL_PRICING.get(option))
+    result = {"id": item["id"], "prompt": item["prompt"], "model": option}
+    try:
+        agent_executor = get_agent_executor_chat_bedrock_converse(
+            option=option,
+            memory=memory,
+            max_iterations=max_iterations,
+            streaming=True,
+            thinking=thinking,
+            username=username,
+        )
+        response = agent_executor.invoke({"input": item["prompt"]}, config={"callbacks": [metrics_handler]})
+        result["status"] = "ok"
+        result["output"] = get_output_text(response["output"])
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    turn = metrics_handler.finish()
+    result["timing"] = {"ttft": turn.ttft, "duration": turn.duration}
+    result["usage"] = {
+        "llm_calls": turn.llm_calls,
+        "tool_calls": turn.tool_calls,
+        "input_tokens": turn.input_tokens,
+        "output_tokens": turn.output_tokens,
+        "cache_read_tokens": turn.cache_read_tokens,
+        "cost": turn.cost,
+    }
+    return result
+
+
+def run_batch(input_path: str, output_path: str, concurrency: int = 4, option: str = MODEL_SONNET_37, thinking: bool = False, max_iterations: int = 25, username: str = "Batch", id_field: str = "id", prompt_field: str = "prompt") -> Dict:
+    """Run all pending prompts with bounded concurrency, appending results to the output file."""
+    completed = read_completed_ids(output_path)
+    truncate_partial_line(output_path)
+    pending: List[Dict] = [item for item in read_prompts(input_path, id_field, prompt_field) if item["id"] not in completed]
+    print(f"{len(completed)} items already done, {len(pending)} to run with concurrency {concurrency}", file=sys.stderr)
+
+    summary = {"ok": 0, "error": 0, "skipped": len(completed)}
+    write_lock = threading.Lock()
+    started = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8") as out:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            futures = [executor.submit(run_item, item, option, thinking, max_iterations, username) for item in pending]
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                with write_lock:
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    out.flush()
+                summary[result["status"]] += 1
+                print(f"[{summary['ok'] + summary['error']}/{len(pending)}] {result['id']} {result['status']} in {result['timing']['duration']:.2f}s", file=sys.stderr)
+        except KeyboardInterrupt:
+            print("Interrupted, finished items are checkpointed; rerun to resume", file=sys.stderr)
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+    summary["elapsed"] = time.perf_counter() - started
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the VIC agent over a JSONL file of prompts")
+    parser.add_argument("input", help="JSONL file with one prompt per line")
+    parser.add_argument("output", help="JSONL file the results are appended to; also used as checkpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="maximum number of prompts in flight")
+    parser.add_argument("--model", default=MODEL_SONNET_37, choices=AVAILABLE_MODELS)
+    parser.add_argument("--thinking", action="store_true", help="enable extended thinking")
+    parser.add_argument("--max-iterations", type=int, default=25)
+    parser.add_argument("--username", default="Batch")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--prompt-field", default="prompt")
+    args = parser.parse_args()
+
+    summary = run_batch(
+        args.input,
+        args.output,
+        concurrency=args.concurrency,
+        option=args.model,
+        thinking=args.thinking,
+        max_iterations=args.max_iterations,
+        username=args.username,
+        id_field=args.id_field,
+        prompt_field=args.prompt_field,
+    )
+    print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Per-user fair scheduling of Bedrock model calls.
+
+All sessions of a server process share the Bedrock account. FairScheduler admits model
+calls in weighted fair queuing order per user: each call gets a virtual finish tag of
+max(virtual time, the user's last tag) + 1 / weight, and the waiting call with the
+smallest tag runs first, so a user with a long tool loop takes turns with everybody else
+instead of crowding them out. On top of that it caps the calls in flight, in total and
+per user, and holds back the calls of a user over the tokens-per-minute quota until the
+window has room again.
+
+ScheduledClient wraps a bedrock-runtime client for one user; pass it as the client of
+ChatBedrockConverse. The seconds each call waited for admission are reported to
+`on_wait`, e.g. SessionMetricsCallbackHandler.add_queue_wait.
+
+Defaults come from BEDROCK_MAX_CONCURRENCY, BEDROCK_USER_CONCURRENCY and
+BEDROCK_USER_TOKENS_PER_MINUTE (0 means no quota).
+"""
+import itertools
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Callable, Dict, Iterator, Optional
+
+MAX_CONCURRENCY = int(os.environ.get("BEDROCK_MAX_CONCURRENCY", 8))
+USER_CONCURRENCY = int(os.environ.get("BEDROCK_USER_CONCURRENCY", 2))
+USER_TOKENS_PER_MINUTE = int(os.environ.get("BEDROCK_USER_TOKENS_PER_MINUTE", 0))
+# Longest a call waits for admission before it fails
+MAX_QUEUE_SECONDS = 300.0
+WINDOW_SECONDS = 60.0
+
+
+class QueueTimeout(Exception):
+    pass
+
+
+class FairScheduler:
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, user_concurrency: int = USER_CONCURRENCY, tokens_per_minute: int = USER_TOKENS_PER_MINUTE, weights: Dict[str, float] = None, max_queue_seconds: float = MAX_QUEUE_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.user_concurrency = user_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.weights = weights or {}
+        self.max_queue_seconds = max_queue_seconds
+        self.virtual_time = 0.0
+        self.last_tag: Dict[str, float] = defaultdict(float)
+        self.running: Dict[str, int] = defaultdict(int)
+        self.usage: Dict[str, deque] = defaultdict(deque)  # (time, tokens) per user within the window
+        self.waiting = []  # (tag, sequence, user) of the calls waiting for admission
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+
+    def _window_tokens(self, user: str, now: float) -> int:
+        usage = self.usage[user]
+        while usage and usage[0][0] <= now - WINDOW_SECONDS:
+            usage.popleft()
+        return sum(tokens for _, tokens in usage)
+
+    def _quota_free_at(self, user: str, now: float) -> float:
+        """When the user is (or was) under the tokens-per-minute quota again."""
+        if not self.tokens_per_minute or self._window_tokens(user, now) < self.tokens_per_minute:
+            return now
+        return self.usage[user][0][0] + WINDOW_SECONDS
+
+    def _next_admissible(self, now: float):
+        """The waiting entry with the smallest tag whose user is under its limits, and the earliest quota expiry."""
+        retry_at = None
+        for entry in sorted(self.waiting):
+            user = entry[2]
+            if self.running[user] >= self.user_concurrency:
+                continue
+            free_at = self._quota_free_at(user, now)
+            if free_at > now:
+                retry_at = free_at if retry_at is None else min(retry_at, free_at)
+                continue
+            return entry, retry_at
+        return None, retry_at
+
+    def acquire(self, user: str) -> float:
+        """Block until a call of the user may run; returns the seconds waited."""
+        started = time.monotonic()
+        with self.condition:
+            tag = max(self.virtual_time, self.last_tag[user]) + 1.0 / self.weights.get(user, 1.0)
+            self.last_tag[user] = tag
+            entry = (tag, next(self.sequence), user)
+            self.waiting.append(entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    head, retry_at = self._next_admissible(now)
+                    if head is entry and sum(self.running.values()) < self.max_concurrency:
+                        break
+                    if now - started > self.max_queue_seconds:
+                        raise QueueTimeout(f"Waited more than {self.max_queue_seconds:.0f}s for a Bedrock slot")
+                    timeout = self.max_queue_seconds - (now - started)
+                    if retry_at is not None:
+                        timeout = min(timeout, retry_at - now)
+                    self.condition.wait(max(timeout, 0.01))
+            finally:
+                self.waiting.remove(entry)
+                self.condition.notify_all()
+            self.virtual_time = max(self.virtual_time, tag - 1.0 / self.weights.get(user, 1.0))
+            self.running[user] += 1
+        return time.monotonic() - started
+
+    def release(self, user: str, tokens: int = 0):
+        with self.condition:
+            self.running[user] -= 1
+            if tokens:
+                self.usage[user].append((time.monotonic(), tokens))
+            self.condition.notify_all()
+
+    def status(self) -> Dict[str, Dict]:
+        """Calls running and waiting and tokens in the current window, per user."""
+        with self.condition:
+            now = time.monotonic()
+            users = set(self.running) | {user for _, _, user in self.waiting} | set(self.usage)
+            return {
+                user: {"running": self.running[user], "waiting": sum(1 for _, _, waiting in self.waiting if waiting == user), "tokens_per_minute": self._window_tokens(user, now)}
+                for user in sorted(users)
+            }
+
+
+def _tokens(usage: Optional[Dict]) -> int:
+    return (usage or {}).get("inputTokens", 0) + (usage or {}).get("outputTokens", 0)
+
+
+class ScheduledClient:
+    """A bedrock-runtime client whose converse and converse_stream calls go through a FairScheduler for one user."""
+
+    def __init__(self, client, scheduler: FairScheduler, user: str, on_wait: Callable[[float], None] = None):
+        self.client = client
+        self.scheduler = scheduler
+        self.user = user
+        self.on_wait = on_wait
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _acquire(self):
+        waited = self.scheduler.acquire(self.user)
+        if self.on_wait:
+            self.on_wait(waited)
+
+    def converse(self, **kwargs) -> Dict:
+        self._acquire()
+        tokens = 0
+        try:
+            response = self.client.converse(**kwargs)
+            tokens = _tokens(response.get("usage"))
+            return response
+        finally:
+            self.scheduler.release(self.user, tokens)
+
+    def converse_stream(self, **kwargs) -> Dict:
+        self._acquire()
+        try:
+            response = self.client.converse_stream(**kwargs)
+        except BaseException:
+            self.scheduler.release(self.user)
+            raise
+        return {**response, "stream": self._stream(response["stream"])}
+
+    def _stream(self, events) -> Iterator[Dict]:
+        """Pass the events through; the slot is held until the stream ends and its usage is known."""
+        tokens = 0
+        try:
+            for event in events:
+                if "metadata" in event:
+                    tokens = _tokens(event["metadata"].get("usage"))
+                yield event
+        finally:
+            self.scheduler.release(self.user, tokens)
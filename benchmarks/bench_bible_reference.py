@@ -0,0 +1,69 @@
+"""
+Benchmark: the compiled reference parser versus the previous normalize_reference.
+
+Parses and normalizes every reading reference in the ordo and reports throughput, how many
+references each implementation understands, and how many fetches enrichment needs once
+overlapping ranges are merged per book.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_bible_reference --repeat 200
+"""
+import argparse
+import json
+import time
+
+from bible_reference import BOOK_MAP, parse_reference, parse_reference_alternatives, merge_ranges, group_by_book
+from tool_catholic_liturgy import normalize_reference, BIBLE_API_BATCH_SIZE
+
+
+def legacy_normalize_reference(ref: str) -> str:
+    """normalize_reference before the parser: rebuilds the book map on every call, splits on whitespace."""
+    book_map = dict(BOOK_MAP)
+    parts = ref.split()
+    book = " ".join(parts[:-1])
+    verses = parts[-1]
+    full_book = book_map.get(book, book)
+    return f"{full_book} {verses}".replace(" ", "%20")
+
+
+def throughput(function, references, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for reference in references:
+            function(reference)
+    return repeat * len(references) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ordo", default="2025_ordo.json")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.ordo, "r", encoding="utf-8") as f:
+        ordo = json.load(f)
+    references = [value for day in ordo for value in day["readings"].values() if value]
+    unique = sorted(set(references))
+
+    legacy = throughput(legacy_normalize_reference, references, args.repeat)
+    parse_reference_alternatives.cache_clear()
+    cold = throughput(lambda reference: parse_reference_alternatives.__wrapped__(reference), references, args.repeat)
+    warm = throughput(normalize_reference, references, args.repeat)
+
+    parsed = {reference: parse_reference(reference) for reference in unique}
+    understood = sum(1 for ranges in parsed.values() if ranges)
+    simple = sum(1 for reference in unique if len(reference.split()) >= 2 and "," not in reference and ";" not in reference and " or " not in reference and "—" not in reference)
+    ranges = [verse_range for value in parsed.values() if value for verse_range in value]
+    books = group_by_book(ranges)
+    merged = sum(len(merge_ranges(book_ranges)) for book_ranges in books.values())
+    batches = sum(-(-len(merge_ranges(book_ranges)) // BIBLE_API_BATCH_SIZE) for book_ranges in books.values())
+
+    print(f"references: {len(references)} ({len(unique)} unique)")
+    print(f"legacy normalize_reference:    {legacy:>12,.0f} refs/s, simple shape only: {simple}/{len(unique)}")
+    print(f"parser (uncached):             {cold:>12,.0f} refs/s, parsed: {understood}/{len(unique)}")
+    print(f"normalize_reference (cached):  {warm:>12,.0f} refs/s")
+    print(f"verse ranges: {len(ranges)}, merged: {merged}, bible-api requests for the year: {batches} (was {len(unique)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: fixed 1024-token thinking budget versus the adaptive per-turn budget.
+
+Runs every prompt against Claude 3.7 Sonnet on Bedrock twice, once with thinking always on
+(the previous behaviour of main.py) and once with the budget from choose_thinking_budget,
+and reports TTFT and total latency per prompt plus the time saved. Needs AWS credentials.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_thinking_budget --repeat 3
+"""
+import argparse
+import statistics
+import time
+
+from langchain_core.messages import HumanMessage
+from claude_bedrock import get_chat_bedrock_converse, get_model_id_for_option, MODEL_SONNET_37, THINKING_BUDGET_TOKENS
+from thinking_budget import choose_thinking_budget
+
+PROMPTS = [
+    "hello",
+    "Thanks, that helps!",
+    "Good morning VIC",
+    "What color are the vestments during Lent?",
+    "Why is Gaudete Sunday rose?",
+    "Compare the gospel readings of every Sunday in Lent and explain the common theme step by step",
+    "Write a python script that calculates the date of Easter for the next 10 years and run it",
+]
+
+
+def time_stream(model, prompt: str) -> tuple[float, float]:
+    """Stream one answer and return (TTFT, total latency) in seconds."""
+    started = time.perf_counter()
+    ttft = None
+    for chunk in model.stream([HumanMessage(content=prompt)]):
+        if ttft is None and chunk.content:
+            ttft = time.perf_counter() - started
+    return ttft or 0.0, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    model_id = get_model_id_for_option(MODEL_SONNET_37)
+
+    print(f"{'budget':>13} {'fixed ttft':>10} {'adapt ttft':>10} {'fixed total':>11} {'adapt total':>11}  prompt")
+    saved = []
+    for prompt in PROMPTS:
+        budget = choose_thinking_budget(prompt)
+        fixed_model = get_chat_bedrock_converse(model_id, thinking=True, thinking_budget=THINKING_BUDGET_TOKENS)
+        adaptive_model = get_chat_bedrock_converse(model_id, thinking=budget > 0, thinking_budget=budget)
+        fixed = [time_stream(fixed_model, prompt) for _ in range(args.repeat)]
+        adaptive = [time_stream(adaptive_model, prompt) for _ in range(args.repeat)]
+        fixed_ttft, fixed_total = (statistics.median(x) for x in zip(*fixed))
+        adaptive_ttft, adaptive_total = (statistics.median(x) for x in zip(*adaptive))
+        saved.append(fixed_total - adaptive_total)
+        print(f"{budget:>13} {fixed_ttft:>10.2f} {adaptive_ttft:>10.2f} {fixed_total:>11.2f} {adaptive_total:>11.2f}  {prompt[:50]}")
+    print(f"median latency saved per turn: {statistics.median(saved):.2f}s, total: {sum(saved):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
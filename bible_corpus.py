@@ -0,0 +1,163 @@
+"""
+Offline World English Bible corpus in a single memory-mapped file.
+
+Layout of the corpus file (all integers little-endian uint32):
+
+    header   magic b"WEB1", verse count n
+    keys     n sorted verse keys, (book << 20) | (chapter << 10) | verse
+    offsets  n byte offsets of the verse texts
+    lengths  n byte lengths of the verse texts
+    text     UTF-8 verse texts in canonical order, separated by newlines
+
+The arrays are read in place through memoryviews over the mmap, so a verse range is a
+binary search plus a zero-copy slice of the text, and a random verse is a random index.
+
+Build from the public-domain WEB verse-per-line text (e.g. eng-web_vpl.txt from ebible.org,
+lines like 'GEN 1:1 In the beginning, God created the heavens and the earth.'):
+    python bible_corpus.py eng-web_vpl.txt --output web_bible.bin
+"""
+import argparse
+import mmap
+import os
+import random
+import re
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Optional, Tuple
+
+from bible_reference import VerseRange
+
+CORPUS_PATH = os.environ.get("BIBLE_CORPUS", "web_bible.bin")
+
+MAGIC = b"WEB1"
+HEADER = struct.Struct("<4sI")
+
+# USFM book IDs in canonical order, with the book names used by bible_reference
+BOOKS = [
+    ("GEN", "Genesis"), ("EXO", "Exodus"), ("LEV", "Leviticus"), ("NUM", "Numbers"), ("DEU", "Deuteronomy"),
+    ("JOS", "Joshua"), ("JDG", "Judges"), ("RUT", "Ruth"), ("1SA", "1 Samuel"), ("2SA", "2 Samuel"),
+    ("1KI", "1 Kings"), ("2KI", "2 Kings"), ("1CH", "1 Chronicles"), ("2CH", "2 Chronicles"), ("EZR", "Ezra"),
+    ("NEH", "Nehemiah"), ("TOB", "Tobit"), ("JDT", "Judith"), ("EST", "Esther"), ("1MA", "1 Maccabees"),
+    ("2MA", "2 Maccabees"), ("JOB", "Job"), ("PSA", "Psalms"), ("PRO", "Proverbs"), ("ECC", "Ecclesiastes"),
+    ("SNG", "Song of Solomon"), ("WIS", "Wisdom"), ("SIR", "Sirach"), ("ISA", "Isaiah"), ("JER", "Jeremiah"),
+    ("LAM", "Lamentations"), ("BAR", "Baruch"), ("EZK", "Ezekiel"), ("DAN", "Daniel"), ("HOS", "Hosea"),
+    ("JOL", "Joel"), ("AMO", "Amos"), ("OBA", "Obadiah"), ("JON", "Jonah"), ("MIC", "Micah"),
+    ("NAM", "Nahum"), ("HAB", "Habakkuk"), ("ZEP", "Zephaniah"), ("HAG", "Haggai"), ("ZEC", "Zechariah"),
+    ("MAL", "Malachi"), ("MAT", "Matthew"), ("MRK", "Mark"), ("LUK", "Luke"), ("JHN", "John"),
+    ("ACT", "Acts"), ("ROM", "Romans"), ("1CO", "1 Corinthians"), ("2CO", "2 Corinthians"), ("GAL", "Galatians"),
+    ("EPH", "Ephesians"), ("PHP", "Philippians"), ("COL", "Colossians"), ("1TH", "1 Thessalonians"), ("2TH", "2 Thessalonians"),
+    ("1TI", "1 Timothy"), ("2TI", "2 Timothy"), ("TIT", "Titus"), ("PHM", "Philemon"), ("HEB", "Hebrews"),
+    ("JAS", "James"), ("1PE", "1 Peter"), ("2PE", "2 Peter"), ("1JN", "1 John"), ("2JN", "2 John"),
+    ("3JN", "3 John"), ("JUD", "Jude"), ("REV", "Revelation"),
+]
+BOOK_INDEX = {name: index for index, (_, name) in enumerate(BOOKS)}
+USFM_INDEX = {usfm: index for index, (usfm, _) in enumerate(BOOKS)}
+
+VPL_LINE = re.compile(r"^(\w{3})\s+(\d+):(\d+)\s+(.*)$")
+
+
+def verse_key(book_index: int, chapter: int, verse: int) -> int:
+    return (book_index << 20) | (chapter << 10) | verse
+
+
+def split_key(key: int) -> Tuple[int, int, int]:
+    return key >> 20, (key >> 10) & 0x3FF, key & 0x3FF
+
+
+def build_corpus(source: str, output: str = CORPUS_PATH) -> int:
+    """Write the corpus file from a verse-per-line source; returns the number of verses."""
+    verses = []
+    with open(source, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            match = VPL_LINE.match(line.strip())
+            if not match or match.group(1) not in USFM_INDEX or not match.group(4).strip():
+                continue  # books outside the canon list (e.g. Greek Esther) and empty verses
+            usfm, chapter, verse, text = match.groups()
+            verses.append((verse_key(USFM_INDEX[usfm], int(chapter), int(verse)), text.strip().encode("utf-8")))
+    verses.sort(key=lambda item: item[0])
+
+    keys, offsets, lengths = array("I"), array("I"), array("I")
+    position = 0
+    for key, text in verses:
+        keys.append(key)
+        offsets.append(position)
+        lengths.append(len(text))
+        position += len(text) + 1
+    with open(output, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(verses)))
+        for values in (keys, offsets, lengths):
+            f.write(values.tobytes())
+        for _, text in verses:
+            f.write(text + b"\n")
+    return len(verses)
+
+
+class BibleCorpus:
+    """Read-only view of a corpus file; safe to share between threads."""
+
+    def __init__(self, path: str = CORPUS_PATH):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Bible corpus file")
+        view = memoryview(self._mmap)
+        start = HEADER.size
+        size = 4 * self.count
+        self._keys = view[start:start + size].cast("I")
+        self._offsets = view[start + size:start + 2 * size].cast("I")
+        self._lengths = view[start + 2 * size:start + 3 * size].cast("I")
+        self._text = view[start + 3 * size:]
+
+    def _bounds(self, verse_range: VerseRange) -> Tuple[int, int]:
+        book_index = BOOK_INDEX.get(verse_range.book)
+        if book_index is None:
+            return 0, 0
+        first = bisect_left(self._keys, verse_key(book_index, verse_range.start_chapter, verse_range.start_verse))
+        last = bisect_right(self._keys, verse_key(book_index, verse_range.end_chapter, verse_range.end_verse))
+        return first, last
+
+    def get_bytes(self, verse_range: VerseRange) -> memoryview:
+        """Zero-copy slice of the newline separated UTF-8 verse texts of a range."""
+        first, last = self._bounds(verse_range)
+        if first >= last:
+            return self._text[0:0]
+        return self._text[self._offsets[first]:self._offsets[last - 1] + self._lengths[last - 1]]
+
+    def get_text(self, ranges: Iterable[VerseRange]) -> Optional[str]:
+        """Text of one or more verse ranges, or None when a range is not in the corpus."""
+        parts = []
+        for verse_range in ranges:
+            data = self.get_bytes(verse_range)
+            if not data:
+                return None
+            parts.append(str(data, "utf-8").replace("\n", " "))
+        return " ".join(parts) if parts else None
+
+    def random_verse(self) -> Tuple[str, int, int, str]:
+        """A uniformly random verse as (book, chapter, verse, text)."""
+        index = random.randrange(self.count)
+        book_index, chapter, verse = split_key(self._keys[index])
+        offset = self._offsets[index]
+        text = str(self._text[offset:offset + self._lengths[index]], "utf-8")
+        return BOOKS[book_index][1], chapter, verse, text
+
+
+_corpus = None
+
+
+def get_corpus() -> Optional[BibleCorpus]:
+    """The shared corpus, or None when the corpus file has not been built."""
+    global _corpus
+    if _corpus is None and os.path.exists(CORPUS_PATH):
+        _corpus = BibleCorpus(CORPUS_PATH)
+    return _corpus
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the memory-mapped WEB Bible corpus")
+    parser.add_argument("source", help="verse-per-line WEB text, e.g. eng-web_vpl.txt")
+    parser.add_argument("--output", default=CORPUS_PATH)
+    args = parser.parse_args()
+    print(f"{build_corpus(args.source, args.output)} verses written to {args.output}")
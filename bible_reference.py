@@ -0,0 +1,149 @@
+"""
+Parser for the Bible references used in the ordo, e.g. 'Is 55:1-3, 6-9', '1 Jn 2:29—3:6',
+'Heb 4:14-16; 5:7-9' or 'Mt 1:1-16, 18-23 or 1:18-23'.
+
+References are turned into canonical verse ranges, so overlapping readings can be merged and
+every verse fetched once. Partial verse markers ('11b', '12ab') are widened to the whole verse,
+and of several alternatives ('... or ...') the first one is used, as in the liturgy itself.
+Placeholders like the psalm values 'Prop' or 'II' do not parse and yield None.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+BOOK_MAP = {
+    "Gn": "Genesis", "Ex": "Exodus", "Lv": "Leviticus", "Nm": "Numbers", "Dt": "Deuteronomy",
+    "Jos": "Joshua", "Jgs": "Judges", "Ru": "Ruth", "1 Sm": "1 Samuel", "2 Sm": "2 Samuel",
+    "1 Kgs": "1 Kings", "2 Kgs": "2 Kings", "1 Chr": "1 Chronicles", "2 Chr": "2 Chronicles",
+    "Ezr": "Ezra", "Neh": "Nehemiah", "Tb": "Tobit", "Jdt": "Judith", "Est": "Esther",
+    "1 Mc": "1 Maccabees", "2 Mc": "2 Maccabees", "Jb": "Job", "Ps": "Psalms", "Prv": "Proverbs",
+    "Eccl": "Ecclesiastes", "Sg": "Song of Solomon", "Wis": "Wisdom", "Sir": "Sirach",
+    "Is": "Isaiah", "Jer": "Jeremiah", "Lam": "Lamentations", "Bar": "Baruch", "Ez": "Ezekiel",
+    "Dn": "Daniel", "Hos": "Hosea", "Jl": "Joel", "Am": "Amos", "Ob": "Obadiah", "Jon": "Jonah",
+    "Mi": "Micah", "Na": "Nahum", "Hb": "Habakkuk", "Zep": "Zephaniah", "Hg": "Haggai",
+    "Zec": "Zechariah", "Mal": "Malachi", "Mt": "Matthew", "Mk": "Mark", "Lk": "Luke",
+    "Jn": "John", "Acts": "Acts", "Rom": "Romans", "1 Cor": "1 Corinthians", "2 Cor": "2 Corinthians",
+    "Gal": "Galatians", "Eph": "Ephesians", "Phil": "Philippians", "Col": "Colossians",
+    "1 Thes": "1 Thessalonians", "2 Thes": "2 Thessalonians", "1 Tm": "1 Timothy",
+    "2 Tm": "2 Timothy", "Ti": "Titus", "Phlm": "Philemon", "Heb": "Hebrews", "Jas": "James",
+    "1 Pt": "1 Peter", "2 Pt": "2 Peter", "1 Jn": "1 John", "2 Jn": "2 John", "3 Jn": "3 John",
+    "Jude": "Jude", "Rv": "Revelation"
+}
+
+# Books with a single chapter, cited by verse only ('Phlm 9-10, 12-17')
+SINGLE_CHAPTER_BOOKS = {"Obadiah", "Philemon", "2 John", "3 John", "Jude"}
+
+_BOOKS = {**BOOK_MAP, **{name: name for name in BOOK_MAP.values()}}
+BOOK_PATTERN = re.compile(
+    r"^\s*(" + "|".join(re.escape(book) for book in sorted(_BOOKS, key=len, reverse=True)) + r")\.?\s+(\S.*)$"
+)
+ALTERNATIVES_PATTERN = re.compile(r"\s+or\s+")
+PARTS_PATTERN = re.compile(r"[,;]")
+PART_PATTERN = re.compile(r"^\s*(?:(\d+):)?(\d+)[a-d]*(?:\s*[-–—]\s*(?:(\d+):)?(\d+)[a-d]*)?\s*$")
+
+
+class VerseRange(NamedTuple):
+    book: str
+    start_chapter: int
+    start_verse: int
+    end_chapter: int
+    end_verse: int
+
+    def contains(self, book: str, chapter: int, verse: int) -> bool:
+        return book == self.book and (self.start_chapter, self.start_verse) <= (chapter, verse) <= (self.end_chapter, self.end_verse)
+
+    def __str__(self) -> str:
+        if self.start_chapter == self.end_chapter:
+            verses = str(self.start_verse) if self.start_verse == self.end_verse else f"{self.start_verse}-{self.end_verse}"
+            return f"{self.book} {self.start_chapter}:{verses}"
+        return f"{self.book} {self.start_chapter}:{self.start_verse}-{self.end_chapter}:{self.end_verse}"
+
+
+def _parse_alternative(text: str, book: Optional[str]) -> Optional[Tuple[VerseRange, ...]]:
+    match = BOOK_PATTERN.match(text)
+    if match:
+        book, text = _BOOKS[match.group(1)], match.group(2)
+    if book is None:
+        return None
+    chapter = 1 if book in SINGLE_CHAPTER_BOOKS else None
+    ranges = []
+    for part in PARTS_PATTERN.split(text):
+        match = PART_PATTERN.match(part)
+        if not match:
+            return None
+        start_chapter, start_verse, end_chapter, end_verse = match.groups()
+        if start_chapter:
+            chapter = int(start_chapter)
+        if chapter is None:
+            return None
+        start = int(start_verse)
+        if end_verse is None:
+            ranges.append(VerseRange(book, chapter, start, chapter, start))
+            continue
+        end_chapter = int(end_chapter) if end_chapter else chapter
+        ranges.append(VerseRange(book, chapter, start, end_chapter, int(end_verse)))
+        chapter = end_chapter
+    return tuple(ranges) or None
+
+
+@lru_cache(maxsize=4096)
+def parse_reference_alternatives(reference: str) -> Tuple[Tuple[VerseRange, ...], ...]:
+    """Parse all alternatives of a reference; later alternatives inherit the book of the earlier ones."""
+    if not reference:
+        return ()
+    alternatives = []
+    book = None
+    for text in ALTERNATIVES_PATTERN.split(reference.strip()):
+        ranges = _parse_alternative(text, book)
+        if ranges is None:
+            break
+        alternatives.append(ranges)
+        book = ranges[-1].book
+    return tuple(alternatives)
+
+
+def parse_reference(reference: str) -> Optional[Tuple[VerseRange, ...]]:
+    """Parse a reference into verse ranges (first alternative), or None for placeholders and unknown shapes."""
+    alternatives = parse_reference_alternatives(reference)
+    return alternatives[0] if alternatives else None
+
+
+def merge_ranges(ranges: Iterable[VerseRange]) -> List[VerseRange]:
+    """Sort ranges and merge the ones of the same book that overlap or touch within a chapter."""
+    merged: List[VerseRange] = []
+    for current in sorted(set(ranges)):
+        if merged:
+            last = merged[-1]
+            touches = (current.start_chapter, current.start_verse) <= (last.end_chapter, last.end_verse + 1)
+            if current.book == last.book and touches:
+                end = max((last.end_chapter, last.end_verse), (current.end_chapter, current.end_verse))
+                merged[-1] = last._replace(end_chapter=end[0], end_verse=end[1])
+                continue
+        merged.append(current)
+    return merged
+
+
+def format_ranges(ranges: Iterable[VerseRange]) -> str:
+    """Canonical form of ranges of one book, e.g. 'Isaiah 55:1-3,6-9' or 'Hebrews 4:14-16,5:7-9'."""
+    parts = []
+    book = None
+    chapter = None
+    for verse_range in ranges:
+        text = str(verse_range)
+        if book is None:
+            book = verse_range.book
+            parts.append(text)
+        else:
+            text = text[len(book) + 1:]
+            if verse_range.start_chapter == chapter:
+                text = text.split(":", 1)[1]  # same chapter, verses only
+            parts.append(text)
+        chapter = verse_range.end_chapter
+    return ",".join(parts)
+
+
+def group_by_book(ranges: Iterable[VerseRange]) -> Dict[str, List[VerseRange]]:
+    books: Dict[str, List[VerseRange]] = {}
+    for verse_range in ranges:
+        books.setdefault(verse_range.book, []).append(verse_range)
+    return books
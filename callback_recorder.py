@@ -0,0 +1,191 @@
+"""
+Record and replay the callback event stream of agent turns.
+
+CallbackRecorder is an ordinary callback handler that writes every event it sees
+(token payloads, model and tool starts/ends, agent actions) with its time offset to a
+JSONL file. replay() feeds a recording back into any handlers at real or accelerated
+speed and reports the time spent inside each handler method, so UI rendering can be
+profiled and compared without Bedrock:
+
+    python callback_recorder.py recordings/20250301-101500.jsonl --speed 0
+    streamlit run replay_app.py -- recordings/20250301-101500.jsonl
+"""
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Tuple
+from uuid import UUID
+
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+RECORDINGS_DIR = os.environ.get("RECORDINGS_DIR", "recordings")
+
+
+def encode_event(method: str, args: tuple) -> List[Any]:
+    """JSON form of the arguments of a callback event."""
+    if method == "on_llm_end":
+        response = args[0]
+        return [[getattr(getattr(generation, "message", None), "usage_metadata", None) for generations in response.generations for generation in generations]]
+    if method == "on_agent_action":
+        action = args[0]
+        return [{"tool": action.tool, "tool_input": action.tool_input, "log": action.log}]
+    if method == "on_agent_finish":
+        finish = args[0]
+        return [{"return_values": finish.return_values, "log": finish.log}]
+    if method in ("on_tool_end", "on_tool_error"):
+        return [str(getattr(args[0], "content", args[0]))]
+    return list(args)
+
+
+def decode_event(method: str, args: List[Any]) -> tuple:
+    """Callback arguments from their JSON form, shaped like the live objects."""
+    if method == "on_llm_end":
+        generations = [[ChatGeneration(message=AIMessage(content="", usage_metadata=usage)) for usage in args[0] if usage]]
+        return (LLMResult(generations=generations),)
+    if method == "on_agent_action":
+        return (AgentAction(**args[0]),)
+    if method == "on_agent_finish":
+        return (AgentFinish(**args[0]),)
+    if method == "on_tool_error":
+        return (RuntimeError(args[0]),)
+    return tuple(args)
+
+
+class CallbackRecorder(BaseCallbackHandler):
+    """Writes the callback events of a turn, with their offset in seconds, to a JSONL file."""
+
+    def __init__(self, path: str = None, **metadata):
+        if path is None:
+            os.makedirs(RECORDINGS_DIR, exist_ok=True)
+            path = os.path.join(RECORDINGS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S-%f") + ".jsonl")
+        self.path = path
+        self.started_at = time.perf_counter()
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write(json.dumps({"recorded_at": datetime.now().isoformat(), **metadata}) + "\n")
+
+    def _record(self, method: str, *args, run_id=None, parent_run_id=None):
+        if self.file.closed:
+            return
+        try:
+            event = {
+                "t": round(time.perf_counter() - self.started_at, 6),
+                "event": method,
+                "args": encode_event(method, args),
+                "run_id": str(run_id) if run_id else None,
+                "parent_run_id": str(parent_run_id) if parent_run_id else None,
+            }
+            self.file.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+        except Exception as e:
+            print(f"Error recording {method}: {e}")
+
+    def on_chat_model_start(self, serialized: dict, messages: list, **kwargs):
+        self._record("on_chat_model_start", {"name": serialized.get("name")}, [], run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_llm_start(self, serialized: dict, prompts: list, **kwargs):
+        self._record("on_llm_start", {"name": serialized.get("name")}, prompts, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_llm_new_token(self, token, **kwargs):
+        self._record("on_llm_new_token", token, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_llm_end(self, response, **kwargs):
+        self._record("on_llm_end", response, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_tool_start(self, serialized: dict, input_str: str, **kwargs):
+        self._record("on_tool_start", serialized, input_str, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_tool_end(self, output, **kwargs):
+        self._record("on_tool_end", output, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_tool_error(self, error, **kwargs):
+        self._record("on_tool_error", error, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_agent_action(self, action, **kwargs):
+        self._record("on_agent_action", action, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_agent_finish(self, finish, **kwargs):
+        self._record("on_agent_finish", finish, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_text(self, text: str, **kwargs):
+        self._record("on_text", text, run_id=kwargs.get("run_id"), parent_run_id=kwargs.get("parent_run_id"))
+
+    def on_custom_event(self, name: str, data, *, run_id, **kwargs):
+        self._record("on_custom_event", name, data, run_id=run_id)
+
+    def close(self):
+        self.file.close()
+
+
+def read_metadata(path: str) -> Dict:
+    """The metadata of a recording, from its first line."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.loads(f.readline())
+
+
+def read_recording(path: str) -> Tuple[Dict, Iterator[Tuple[float, str, tuple, Dict]]]:
+    """The metadata of a recording and an iterator over its (offset, method, args, kwargs) events.
+
+    The file is only opened for the events once iteration starts, and closed when it ends.
+    """
+    def events():
+        with open(path, "r", encoding="utf-8") as f:
+            f.readline()  # metadata
+            for line in f:
+                if line.strip():
+                    event = json.loads(line)
+                    kwargs = {key: UUID(event[key]) for key in ("run_id", "parent_run_id") if event.get(key)}
+                    yield event["t"], event["event"], decode_event(event["event"], event["args"]), kwargs
+    return read_metadata(path), events()
+
+
+def replay(path: str, handlers: List[BaseCallbackHandler], speed: float = 1.0) -> Dict:
+    """Feed a recording into the handlers; speed 2 is twice as fast, 0 as fast as possible.
+
+    Returns the wall-clock time of the replay and, per callback method, the number of
+    calls and the seconds spent inside the handlers.
+    """
+    _, events = read_recording(path)
+    profile = defaultdict(lambda: {"calls": 0, "seconds": 0.0})
+    started = time.perf_counter()
+    for offset, method, args, kwargs in events:
+        if speed > 0:
+            delay = offset / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+        for handler in handlers:
+            call_started = time.perf_counter()
+            try:
+                getattr(handler, method)(*args, **kwargs)
+            except NotImplementedError:
+                if method == "on_chat_model_start":
+                    handler.on_llm_start(args[0], [""], **kwargs)
+            except Exception as e:
+                print(f"Error in {type(handler).__name__}.{method}: {e}")
+            profile[method]["calls"] += 1
+            profile[method]["seconds"] += time.perf_counter() - call_started
+    return {"elapsed": time.perf_counter() - started, "handlers": dict(profile)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded turn into the streaming handler and profile it")
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=0, help="replay speed, 1 for real time, 0 for as fast as possible")
+    args = parser.parse_args()
+
+    from streaming_response_callback_handler import StreamingResponseCallbackHandler
+
+    class NullArea:
+        """Stands in for a Streamlit placeholder outside of Streamlit."""
+        def markdown(self, *args, **kwargs):
+            pass
+
+        def empty(self):
+            pass
+
+    handler = StreamingResponseCallbackHandler(thinking_area=NullArea(), text_area=NullArea())
+    print(json.dumps(replay(args.recording, [handler], args.speed), indent=2))
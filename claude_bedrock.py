@@ -4,6 +4,9 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.memory import ConversationBufferMemory
 from tools import tools
 from tool_catholic_liturgy import get_random_verse, get_litury_for_today
+from botocore.config import Config
+from turn_budget import BudgetedAgentExecutor, TurnController
+from scratchpad_compaction import compact_scratchpad
 import boto3
 import time
 
@@ -64,6 +67,16 @@ MODEL_SONNET_35_V1 = "Sonnet 3.5:1.0"
 # List of all available models
 AVAILABLE_MODELS = [MODEL_SONNET_37, MODEL_SONNET_35_V2, MODEL_SONNET_35_V1]
 
+# Default extended thinking budget, also the minimum Bedrock accepts
+THINKING_BUDGET_TOKENS = 1024
+
+# Estimated on-demand prices in USD per million tokens, used for cost reporting
+MODEL_PRICING = {
+    MODEL_SONNET_37: {"input": 3.0, "output": 15.0, "cache_read": 0.30, "cache_write": 3.75},
+    MODEL_SONNET_35_V2: {"input": 3.0, "output": 15.0, "cache_read": 0.30, "cache_write": 3.75},
+    MODEL_SONNET_35_V1: {"input": 3.0, "output": 15.0, "cache_read": 0.30, "cache_write": 3.75},
+}
+
 def get_model_id_for_option(option: str) -> str:
     if option == "Sonnet 3.7:1.0":
         return "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
@@ -74,29 +87,74 @@ def get_model_id_for_option(option: str) -> str:
     else:
         raise ValueError(f"Invalid model option: {option}")
 
+def get_model_ids_for_option(option: str) -> list[str]:
+    """
+    Returns the model IDs that can serve an option, the cross-region inference profile first.
+    The in-region model IDs are used as failover targets when the inference profile is throttled.
+    """
+    model_id = get_model_id_for_option(option)
+    if option == MODEL_SONNET_37:
+        return [model_id]  # only available through the inference profile
+    return [model_id, model_id.removeprefix("us.")]
+
+def get_bedrock_client(read_timeout: int):
+    """
+    Creates a bedrock-runtime client without retries.
+    read_timeout bounds every socket read of a response, so for a stream it is the longest allowed
+    gap between two events (including thinking pauses), not a first-token deadline.
+    """
+    return session.client('bedrock-runtime', config=Config(read_timeout=read_timeout, retries={"total_max_attempts": 1}))
+
 def get_current_date_time() -> str:
     """
     Retrieves the current date and time in RFC 3339 format.
     """
     return time.strftime("%Y-%m-%dT%H:%M:%S%z")
 
-def get_chat_bedrock_converse(model_id: str, thinking: bool = False, streaming: bool = True) -> ChatBedrockConverse:
+def get_output_text(output) -> str:
+    """
+    Returns the answer text of an agent output, which is either a string or a list of Converse content blocks.
+    """
+    if isinstance(output, str):
+        return output
+    return "".join(block.get("text", "") for block in output if isinstance(block, dict) and block.get("type") == "text")
+
+def supports_thinking(model_id: str) -> bool:
+    """
+    Extended thinking is only available on Claude 3.7 Sonnet.
+    """
+    return "claude-3-7" in model_id
+
+def get_chat_bedrock_converse(model_id: str, thinking: bool = False, streaming: bool = True, client=None, thinking_budget: int = THINKING_BUDGET_TOKENS) -> ChatBedrockConverse:
     disable_streaming = not streaming
     additional_model_request_fields = {}
-    if thinking:
-        additional_model_request_fields = { "thinking": { "type": "enabled", "budget_tokens": 1024 } }
+    if thinking and thinking_budget and supports_thinking(model_id):
+        additional_model_request_fields = { "thinking": { "type": "enabled", "budget_tokens": max(thinking_budget, THINKING_BUDGET_TOKENS) } }
     return ChatBedrockConverse(
         model=model_id,
-        client=bedrock_client,
+        client=client or bedrock_client,
         temperature=1,
         max_tokens=8192,
         disable_streaming=disable_streaming,
         additional_model_request_fields=additional_model_request_fields,
     )
 
-def get_agent_executor_chat_bedrock_converse(option: str, memory: ConversationBufferMemory, max_iterations: int = 25, streaming: bool = True, thinking: bool = False, username: str = 'Guest') -> AgentExecutor:
-    model = get_chat_bedrock_converse(get_model_id_for_option(option), thinking, streaming)
-    agent = create_tool_calling_agent(model, tools, prompt.partial(current_date_time=get_current_date_time(), username=username, random_verse=get_random_verse(), liturgy=get_litury_for_today()))
+def get_agent_executor_chat_bedrock_converse(option: str, memory: ConversationBufferMemory, max_iterations: int = 25, streaming: bool = True, thinking: bool = False, username: str = 'Guest', model_id: str = None, client=None, thinking_budget: int = THINKING_BUDGET_TOKENS, controller: TurnController = None, tools: list = tools) -> AgentExecutor:
+    """
+    Pass a TurnController (also as a callback of the invoke) to enforce its budgets and cancellation,
+    and a subset of the tools (see tool_selection.py) to bind only those.
+    """
+    model = get_chat_bedrock_converse(model_id or get_model_id_for_option(option), thinking, streaming, client, thinking_budget)
+    agent = create_tool_calling_agent(model, tools, prompt.partial(current_date_time=get_current_date_time(), username=username, random_verse=get_random_verse(), liturgy=get_litury_for_today()), message_formatter=compact_scratchpad)
+    if controller is not None:
+        return BudgetedAgentExecutor(
+            agent=agent,
+            tools=tools,
+            verbose=False,
+            max_iterations=max_iterations,
+            memory=memory,
+            controller=controller,
+        )
     return AgentExecutor(
         agent=agent, 
         tools=tools, 
@@ -0,0 +1,48 @@
+"""
+File cache keyed by content hash, for work that only depends on the bytes of an input
+(PDF pages converted to text, documents converted to markdown, parsed ordo files).
+
+Entries are JSON files under CONTENT_CACHE_DIR (default: .content_cache), one directory
+per namespace, and are written atomically so concurrent processes can share the cache.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Optional
+
+CACHE_DIR = os.environ.get("CONTENT_CACHE_DIR", ".content_cache")
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ContentHashCache:
+    def __init__(self, namespace: str, directory: str = CACHE_DIR):
+        self.directory = os.path.join(directory, namespace)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(temporary, path)
@@ -0,0 +1,93 @@
+"""
+Normalization of the conversation history kept in memory.
+
+With extended thinking the output of a turn is a list of Converse content blocks:
+reasoning blocks (with their signatures) followed by the answer text. Stored as is,
+every later turn resends the old reasoning to Bedrock and the session keeps it in RAM.
+
+NormalizedWindowMemory stores the answer text as the message content and the reasoning
+text separately in `additional_kwargs["reasoning"]`, drops the signatures, and shortens
+the reasoning of older turns. The prompt only ever gets the answer text: Bedrock needs
+the reasoning blocks only within the running turn (the agent scratchpad), not for
+completed turns.
+"""
+from typing import Any, Dict, List, Tuple
+
+from langchain.memory import ConversationBufferWindowMemory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+# Number of most recent answers whose reasoning is kept in full
+KEEP_REASONING_TURNS = 2
+# Characters kept of the reasoning of older answers
+REASONING_DIGEST_CHARS = 500
+# Agent input key with the user's own words, saved to the history instead of the full agent input
+QUESTION_KEY = "question"
+
+
+def split_content(content: Any) -> Tuple[str, str]:
+    """The answer text and the reasoning text of message content, a string or a list of content blocks."""
+    if isinstance(content, str):
+        return content, ""
+    text, reasoning = [], []
+    for block in content:
+        if isinstance(block, str):
+            text.append(block)
+        elif isinstance(block, dict) and block.get("type") == "text":
+            text.append(block.get("text", ""))
+        elif isinstance(block, dict) and block.get("type") == "reasoning_content":
+            reasoning.append(block.get("reasoning_content", {}).get("text", ""))
+    return "".join(text), "".join(reasoning)
+
+
+def compress_reasoning(reasoning: str) -> str:
+    if len(reasoning) <= REASONING_DIGEST_CHARS:
+        return reasoning
+    return reasoning[:REASONING_DIGEST_CHARS] + f"... [{len(reasoning) - REASONING_DIGEST_CHARS} characters omitted]"
+
+
+def normalize_message(message: BaseMessage) -> BaseMessage:
+    """An AI message with text content and its reasoning in additional_kwargs; other messages unchanged."""
+    if not isinstance(message, AIMessage) or isinstance(message.content, str):
+        return message
+    text, reasoning = split_content(message.content)
+    additional_kwargs = {**message.additional_kwargs, "reasoning": reasoning} if reasoning else message.additional_kwargs
+    return AIMessage(content=text, additional_kwargs=additional_kwargs, id=message.id)
+
+
+def prompt_message(message: BaseMessage) -> BaseMessage:
+    """The message as it is sent to the model: text content only, without stored reasoning."""
+    message = normalize_message(message)
+    if isinstance(message, AIMessage) and "reasoning" in message.additional_kwargs:
+        additional_kwargs = {key: value for key, value in message.additional_kwargs.items() if key != "reasoning"}
+        return AIMessage(content=message.content, additional_kwargs=additional_kwargs, id=message.id)
+    return message
+
+
+class NormalizedWindowMemory(ConversationBufferWindowMemory):
+    """ConversationBufferWindowMemory that stores answers as text and keeps reasoning out of the prompt.
+
+    When the inputs have a QUESTION_KEY, that is stored as the human message instead of the
+    agent input, so text added to the input for the current turn only (injected facts, the
+    list of uploaded documents) is neither shown in the history nor resent on later turns.
+    """
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, Any]) -> None:
+        input_key = QUESTION_KEY if QUESTION_KEY in inputs else self.input_key or next(key for key in inputs if key != "stop" and key not in self.memory_variables)
+        output_key = self.output_key or ("output" if "output" in outputs else next(iter(outputs)))
+        text, reasoning = split_content(outputs[output_key])
+        self.chat_memory.add_messages([
+            HumanMessage(content=inputs[input_key]),
+            AIMessage(content=text, additional_kwargs={"reasoning": reasoning} if reasoning else {}),
+        ])
+        self.compress_old_reasoning()
+
+    def compress_old_reasoning(self) -> None:
+        """Shorten the stored reasoning of all but the KEEP_REASONING_TURNS most recent answers."""
+        answers = [message for message in self.chat_memory.messages if isinstance(message, AIMessage)]
+        for message in answers[:max(len(answers) - KEEP_REASONING_TURNS, 0)]:
+            if message.additional_kwargs.get("reasoning"):
+                message.additional_kwargs["reasoning"] = compress_reasoning(message.additional_kwargs["reasoning"])
+
+    @property
+    def buffer_as_messages(self) -> List[BaseMessage]:
+        return [prompt_message(message) for message in super().buffer_as_messages]
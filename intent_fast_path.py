@@ -0,0 +1,177 @@
+"""
+Deterministic fast path for common liturgy questions.
+
+Questions like "today's gospel", "liturgical color tomorrow" or "Sunday cycle for 2026"
+have exact answers in the ordo. match_intent recognizes them with a few patterns,
+extracts the day or year they are about and looks the answer up locally:
+
+- when the question names the day or year ("today", "tomorrow", a date, "this Sunday",
+  a year) and asks nothing else (every word is accounted for), the answer is given
+  directly, without a model call;
+- when it names the day or year and asks for more, e.g. "explain today's gospel", the
+  facts are added to the agent input, so the model can answer without a tool call;
+- anything else goes to the agent unchanged: questions that name no day or year (e.g.
+  "the gospel for Easter Sunday", "what is a solemnity"), and days outside the ordo.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from tool_catholic_liturgy import get_liturgical_year, get_liturgy_for_day_ordo, get_local_bible_text, get_sunday_cycle, get_weekday_cycle
+
+MONTHS = ["january", "february", "march", "april", "may", "june", "july", "august", "september", "october", "november", "december"]
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+READING_NAMES = {"first_reading": "First reading", "second_reading": "Second reading", "psalm": "Psalm", "gospel": "Gospel"}
+
+# Words that carry no meaning of their own in these questions; "what is a ..." is not among them, so
+# definitional questions ("what is a solemnity") always go to the model
+FILLER = {
+    "the", "are", "was", "will", "be", "which", "who", "for", "of", "on", "in", "at",
+    "to", "me", "please", "can", "could", "you", "tell", "give", "show", "do", "does", "i", "we", "it", "its", "s",
+    "about", "and", "day", "date", "liturgical", "liturgy", "mass", "church", "catholic", "this", "that",
+    "there", "todays", "tomorrows", "yesterdays", "hey", "hi", "thanks", "now", "current", "currently", "used",
+}
+
+INTENTS: List[Tuple[str, re.Pattern]] = [
+    ("sunday_cycle", re.compile(r"\b(sunday|lectionary)\s+cycle\b|\byear\s+[abc]\b|\bcycle\s+[abc]\b")),
+    ("weekday_cycle", re.compile(r"\bweekday\s+cycle\b|\bcycle\s+(i|ii|1|2)\b")),
+    ("gospel", re.compile(r"\bgospel\b")),
+    ("readings", re.compile(r"\b(readings?|first reading|second reading|psalm|scriptures?|lectionary)\b")),
+    ("color", re.compile(r"\b(colou?r|vestments?)\b")),
+    ("season", re.compile(r"\bseason\b")),
+    ("celebration", re.compile(r"\b(feast|saint|celebrat\w*|solemnity|memorial|commemorat\w*|feast day)\b")),
+]
+INTENT_WORDS = {
+    "sunday_cycle": {"sunday", "lectionary", "cycle", "year", "a", "b", "c"},
+    "weekday_cycle": {"weekday", "cycle", "i", "ii", "1", "2"},
+    "gospel": {"gospel", "reading"},
+    "readings": {"reading", "readings", "first", "second", "psalm", "scripture", "scriptures", "lectionary"},
+    "color": {"color", "colour", "vestment", "vestments", "wear", "wearing", "priest"},
+    "season": {"season"},
+    "celebration": {"feast", "saint", "celebrate", "celebrated", "celebrating", "celebration", "solemnity", "memorial", "commemorated", "commemoration"},
+}
+
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+MONTH_DAY = re.compile(r"\b(" + "|".join(MONTHS) + r")\s+(\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(\d{4}))?\b")
+DAY_MONTH = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?(" + "|".join(MONTHS) + r")(?:,?\s+(\d{4}))?\b")
+RELATIVE_DAY = re.compile(r"\b(today|tonight|tomorrow|yesterday)s?\b")
+WEEKDAY = re.compile(r"\b(next|last|this|coming)?\s*(" + "|".join(WEEKDAYS) + r")\b")
+YEAR = re.compile(r"\b(19\d\d|20\d\d|21\d\d)\b")
+RELATIVE_YEAR = re.compile(r"\b(this|current|next|last)\s+(?:liturgical\s+)?year\b")
+WORD = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class IntentMatch:
+    intent: str
+    answer: str
+    direct: bool  # True: answer without the agent, False: add the answer to the agent input as facts
+
+    def agent_input(self, query: str) -> str:
+        return f"{query}\n\n[From the liturgical calendar, no tool call needed for this: {self.answer}]"
+
+
+def extract_day(text: str, today: date) -> Tuple[Optional[date], List[str]]:
+    """The day a question is about and the words that named it; today and no words when none is named."""
+    match = ISO_DATE.search(text)
+    if match:
+        return date(*map(int, match.groups())), [match.group(0)]
+    match = MONTH_DAY.search(text)
+    if match:
+        year = int(match.group(3)) if match.group(3) else today.year
+        return date(year, MONTHS.index(match.group(1)) + 1, int(match.group(2))), [match.group(0)]
+    match = DAY_MONTH.search(text)
+    if match:
+        year = int(match.group(3)) if match.group(3) else today.year
+        return date(year, MONTHS.index(match.group(2)) + 1, int(match.group(1))), [match.group(0)]
+    match = RELATIVE_DAY.search(text)
+    if match:
+        offset = {"today": 0, "tonight": 0, "tomorrow": 1, "yesterday": -1}[match.group(1)]
+        return today + timedelta(days=offset), [match.group(0)]
+    match = WEEKDAY.search(text)
+    previous = WORD.findall(text[:match.start()])[-1:] if match else []
+    # "Easter Sunday" or "Palm Sunday" name a feast, not the coming Sunday
+    if match and (match.group(1) or not previous or previous[0] in FILLER):
+        days_ahead = (WEEKDAYS.index(match.group(2)) - today.weekday()) % 7
+        if match.group(1) == "last":
+            return today - timedelta(days=(7 - days_ahead) % 7 or 7), [match.group(0)]
+        if match.group(1) == "next" and days_ahead == 0:
+            days_ahead = 7
+        return today + timedelta(days=days_ahead), [match.group(0)]
+    return today, []
+
+
+def leftover_words(text: str, intent: str, consumed: List[str]) -> List[str]:
+    """Words of the question that neither the intent nor the date account for."""
+    for part in consumed:
+        text = text.replace(part, " ")
+    return [word for word in WORD.findall(text) if word not in FILLER and word not in INTENT_WORDS[intent]]
+
+
+def describe_day(day: date) -> str:
+    return day.strftime("%A, %B %-d, %Y")
+
+
+def answer_for_day(intent: str, day: date, entry: Dict) -> str:
+    celebrations = entry.get("celebrations", [])
+    title = celebrations[0]["title"] if celebrations else "a weekday"
+    readings = entry.get("readings", {})
+    if intent == "gospel":
+        reference = readings.get("gospel")
+        if not reference:
+            return f"The ordo lists no gospel for {describe_day(day)} ({title})."
+        text = get_local_bible_text(reference)
+        return f"The gospel for {describe_day(day)} ({title}) is **{reference}**." + (f"\n\n{text}" if text else "")
+    if intent == "readings":
+        lines = [f"- {name}: {readings[key]}" for key, name in READING_NAMES.items() if readings.get(key)]
+        return f"The readings for {describe_day(day)} ({title}):\n" + "\n".join(lines)
+    if intent == "color":
+        return f"The liturgical color for {describe_day(day)} ({title}) is **{entry.get('color')}**, in {entry.get('season')}."
+    if intent == "season":
+        return f"{describe_day(day)} is in **{entry.get('season')}**."
+    ranked = "; ".join(f"{celebration['title']} ({celebration['rank']})" for celebration in celebrations)
+    answer = f"On {describe_day(day)} the Church celebrates {ranked or 'a weekday'}."
+    if entry.get("saint"):
+        answer += f" Saint of the day: {entry['saint']}."
+    return answer
+
+
+def answer_for_year(intent: str, year: int) -> str:
+    if intent == "sunday_cycle":
+        return f"The liturgical year {year} (from the First Sunday of Advent {year - 1}) uses Sunday cycle **{get_sunday_cycle(year)}** and weekday cycle **{get_weekday_cycle(year)}**."
+    return f"The liturgical year {year} (from the First Sunday of Advent {year - 1}) uses weekday cycle **{get_weekday_cycle(year)}** and Sunday cycle **{get_sunday_cycle(year)}**."
+
+
+def match_intent(query: str, today: date = None) -> Optional[IntentMatch]:
+    """The fast-path answer for a liturgy question, or None when the agent should handle it."""
+    text = query.lower().replace("'", "")
+    today = today or date.today()
+    intent = next((name for name, pattern in INTENTS if pattern.search(text)), None)
+    if intent is None:
+        return None
+    if intent in ("sunday_cycle", "weekday_cycle"):
+        match = YEAR.search(text)
+        relative = RELATIVE_YEAR.search(text)
+        if match:
+            year, consumed = int(match.group(1)), [match.group(0)]
+        elif relative:
+            offset = {"next": 1, "last": -1}.get(relative.group(1), 0)
+            year, consumed = get_liturgical_year(today) + offset, [relative.group(0)]
+        else:
+            year, consumed = get_liturgical_year(today), []
+        leftover = leftover_words(text, intent, consumed)
+        answer = answer_for_year(intent, year)
+    else:
+        try:
+            day, consumed = extract_day(text, today)
+        except ValueError:  # e.g. February 30
+            return None
+        entry = get_liturgy_for_day_ordo(day.year, day.month, day.day)
+        if entry is None:
+            return None
+        leftover = leftover_words(text, intent, consumed)
+        answer = answer_for_day(intent, day, entry)
+    if not consumed:
+        return None  # no day or year named: "the feast of St. Joseph", "what is a memorial"
+    return IntentMatch(intent=intent, answer=answer, direct=not leftover)
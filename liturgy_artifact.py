@@ -0,0 +1,150 @@
+"""
+Precomputed enriched liturgy, stored in a compact indexed SQLite file.
+
+The ordo is fixed for the year, so the Bible texts of all readings can be fetched once by a
+(nightly) build job instead of on every tool call. The liturgy tools read the artifact when it
+exists and only fall back to live HTTP for days or readings that are missing from it, or
+whose texts the build could not fetch.
+
+Build (from the repository root):
+    python liturgy_artifact.py 2025_ordo.json [2026_ordo.json ...] --output liturgy.sqlite
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+ARTIFACT_PATH = os.environ.get("LITURGY_ARTIFACT", "liturgy.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS days_year_month ON days (year, month);
+CREATE TABLE IF NOT EXISTS readings (
+    reference TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+READING_KEYS = ["first_reading", "second_reading", "gospel"]
+# Text of a reading whose fetch failed
+TEXT_UNAVAILABLE = "Text unavailable"
+# Text of a reading whose fetch was abandoned at a deadline; fetching it again may well succeed
+TEXT_TIMED_OUT = "Text not fetched in time"
+
+_local = threading.local()
+
+
+def get_connection(path: str = ARTIFACT_PATH) -> Optional[sqlite3.Connection]:
+    """Read-only connection for the current thread, or None when the artifact has not been built."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    if path not in connections:
+        if not os.path.exists(path):
+            return None
+        connections[path] = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    return connections[path]
+
+
+def is_complete(day: Dict) -> bool:
+    """False when one of the readings of the day could not be fetched."""
+    return all(reading.get("text") not in (TEXT_UNAVAILABLE, TEXT_TIMED_OUT) for reading in day.get("readings", {}).values())
+
+
+def get_enriched_day(date_str: str, path: str = ARTIFACT_PATH) -> Optional[Dict]:
+    """Enriched liturgy for a 'YYYY-MM-DD' date from the artifact; None when it is missing or incomplete."""
+    connection = get_connection(path)
+    if connection is None:
+        return None
+    row = connection.execute("SELECT data FROM days WHERE date = ?", (date_str,)).fetchone()
+    day = json.loads(row[0]) if row else None
+    return day if day is not None and is_complete(day) else None
+
+
+def get_enriched_month(year: int, month: int, path: str = ARTIFACT_PATH) -> Optional[List[Dict]]:
+    """Enriched liturgy for all days of a month from the artifact, in date order; None when a day is incomplete."""
+    connection = get_connection(path)
+    if connection is None:
+        return None
+    rows = connection.execute("SELECT data FROM days WHERE year = ? AND month = ? ORDER BY date", (year, month)).fetchall()
+    days = [json.loads(row[0]) for row in rows]
+    return days if days and all(is_complete(day) for day in days) else None
+
+
+def get_reading_text(reference: str, path: str = ARTIFACT_PATH) -> Optional[str]:
+    """Bible text of an ordo reference from the artifact."""
+    connection = get_connection(path)
+    if connection is None:
+        return None
+    row = connection.execute("SELECT text FROM readings WHERE reference = ?", (reference,)).fetchone()
+    return row[0] if row else None
+
+
+def enrich_day(day: Dict, texts: Dict[str, str]) -> Dict:
+    """Same shape as get_enhanced_liturgy_for_day, using already fetched reading texts."""
+    enriched = dict(day)
+    readings = day.get("readings", {})
+    enriched["readings"] = {}
+    for key in READING_KEYS:
+        ref = readings.get(key)
+        enriched["readings"][key] = {"reference": ref, "text": texts.get(ref, TEXT_UNAVAILABLE) if ref else "No text available"}
+    enriched["saint"] = day.get("saint", "No saint commemorated")
+    return enriched
+
+
+def build_artifact(ordo_paths: List[str], output: str = ARTIFACT_PATH) -> Dict:
+    """Enrich every day of the given ordo files and write them to the artifact.
+
+    Readings already stored by an earlier build are not fetched again, so a rerun only
+    fetches the texts that failed before or belong to a new year.
+    """
+    from tool_catholic_liturgy import get_bible_texts
+
+    started = time.perf_counter()
+    days: List[Dict] = []
+    for ordo_path in ordo_paths:
+        with open(ordo_path, "r", encoding="utf-8") as f:
+            days.extend(json.load(f))
+
+    connection = sqlite3.connect(output)
+    connection.executescript(SCHEMA)
+    texts = dict(connection.execute("SELECT reference, text FROM readings").fetchall())
+    references = {day["readings"].get(key) for day in days for key in READING_KEYS} - {None} - texts.keys()
+    print(f"{len(days)} days, {len(texts)} readings cached, {len(references)} to fetch")
+
+    # get_bible_texts merges overlapping ranges and fetches each book once, in parallel
+    failed = 0
+    for reference, text in get_bible_texts(sorted(references)).items():
+        if text in (TEXT_UNAVAILABLE, TEXT_TIMED_OUT, "No text available"):
+            failed += 1
+            continue
+        texts[reference] = text
+        connection.execute("INSERT OR REPLACE INTO readings VALUES (?, ?)", (reference, text))
+
+    connection.executemany(
+        "INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?)",
+        [
+            (day["date"], int(day["date"][:4]), int(day["date"][5:7]), json.dumps(enrich_day(day, texts), ensure_ascii=False, separators=(",", ":")))
+            for day in days
+        ],
+    )
+    connection.commit()
+    connection.execute("VACUUM")
+    connection.close()
+    return {"days": len(days), "readings": len(texts), "failed": failed, "elapsed": time.perf_counter() - started}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the precomputed enriched liturgy artifact")
+    parser.add_argument("ordo", nargs="*", default=["2025_ordo.json"], help="ordo JSON files to enrich")
+    parser.add_argument("--output", default=ARTIFACT_PATH)
+    args = parser.parse_args()
+    print(json.dumps(build_artifact(args.ordo, args.output)))
@@ -0,0 +1,255 @@
+"""
+Load test: N concurrent chat sessions against a stub Bedrock backend.
+
+Every simulated session has its own memory and username and runs a few turns through
+the same agent executor main.py builds, with a StubBedrockClient in place of the
+bedrock-runtime client. The stub streams a canned answer with configurable first-token
+latency and token rate, optionally calls a local tool first, and throttles a share of
+the requests or everything above a concurrency limit, like an account quota. With
+--fair-scheduling the calls go through the FairScheduler of main.py.
+
+For every concurrency level the run reports turn latency and TTFT percentiles,
+throughput, error and throttling rates and the peak thread count and memory, to see
+where latency collapses and size instances:
+
+    python load_test.py --concurrency 1,4,16,64 --turns 3 --first-token-latency 0.8
+
+Without web_bible.bin every agent build fetches a random verse from bible-api.com, as
+main.py does; build the offline corpus first to keep the test off the network.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from botocore.exceptions import ClientError
+from langchain_community.chat_message_histories import ChatMessageHistory
+
+from bedrock_scheduler import FairScheduler, ScheduledClient
+from claude_bedrock import AVAILABLE_MODELS, MODEL_PRICING, MODEL_SONNET_37, get_agent_executor_chat_bedrock_converse
+from history_normalization import NormalizedWindowMemory
+from session_metrics_callback_handler import SessionMetricsCallbackHandler
+
+# disable warnings
+import warnings
+from langchain._api.deprecation import LangChainDeprecationWarning
+warnings.filterwarnings("ignore", category=LangChainDeprecationWarning)
+
+PROMPTS = [
+    "hello",
+    "What is the liturgy for today?",
+    "When is the feast of St. Joseph?",
+    "Why is Gaudete Sunday rose?",
+    "Which Sundays in Lent read from John?",
+]
+ANSWER = "Peace be with you. This is a canned answer from the stub backend, streamed one word at a time. " * 3
+
+
+@dataclass
+class StubSettings:
+    first_token_latency: float = 0.5
+    token_interval: float = 0.01
+    throttle_rate: float = 0.0
+    max_in_flight: int = 0  # 0 means no concurrency limit
+    tool_rate: float = 0.5
+
+
+class StubBedrockClient:
+    """Stands in for a bedrock-runtime client: converse_stream streams canned events with simulated latency."""
+
+    class meta:
+        region_name = "us-east-1"
+
+    def __init__(self, settings: StubSettings):
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight_seen = 0
+        self.requests = 0
+        self.throttled = 0
+
+    def _throttle(self):
+        raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "Too many requests, please wait before trying again."}}, "ConverseStream")
+
+    def converse_stream(self, **kwargs) -> Dict:
+        with self.lock:
+            self.requests += 1
+            if random.random() < self.settings.throttle_rate or 0 < self.settings.max_in_flight <= self.in_flight:
+                self.throttled += 1
+                self._throttle()
+            self.in_flight += 1
+            self.max_in_flight_seen = max(self.max_in_flight_seen, self.in_flight)
+        last_message = kwargs["messages"][-1]
+        answered_tool = any("toolResult" in block for block in last_message["content"])
+        use_tool = not answered_tool and random.random() < self.settings.tool_rate
+        return {"stream": self._events(use_tool)}
+
+    def _events(self, use_tool: bool):
+        try:
+            time.sleep(self.settings.first_token_latency)
+            yield {"messageStart": {"role": "assistant"}}
+            if use_tool:
+                tool_use = {"toolUseId": f"tooluse_{uuid.uuid4().hex[:12]}", "name": "search_ordo_tool"}
+                yield {"contentBlockStart": {"contentBlockIndex": 0, "start": {"toolUse": tool_use}}}
+                yield {"contentBlockDelta": {"contentBlockIndex": 0, "delta": {"toolUse": {"input": json.dumps({"query": "easter", "limit": 3})}}}}
+                yield {"contentBlockStop": {"contentBlockIndex": 0}}
+                yield {"messageStop": {"stopReason": "tool_use"}}
+                output_tokens = 20
+            else:
+                words = ANSWER.split(" ")
+                for word in words:
+                    time.sleep(self.settings.token_interval)
+                    yield {"contentBlockDelta": {"contentBlockIndex": 0, "delta": {"text": word + " "}}}
+                yield {"contentBlockStop": {"contentBlockIndex": 0}}
+                yield {"messageStop": {"stopReason": "end_turn"}}
+                output_tokens = len(words)
+            yield {"metadata": {"usage": {"inputTokens": 2000, "outputTokens": output_tokens, "totalTokens": 2000 + output_tokens}, "metrics": {"latencyMs": 0}}}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def current_rss_mb() -> float:
+    """Resident memory of this process in MB (the peak so far where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class ResourceMonitor(threading.Thread):
+    """Samples the thread count and memory of the process until stopped."""
+
+    def __init__(self, interval: float = 0.1):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.peak_threads = 0
+        self.peak_rss_mb = 0.0
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run_session(session_id: int, turns: int, option: str, client: StubBedrockClient, results: List[Dict], lock: threading.Lock, scheduler: FairScheduler = None):
+    """One simulated user: its own memory and username, `turns` turns one after the other."""
+    memory = NormalizedWindowMemory(chat_memory=ChatMessageHistory(), return_messages=True, memory_key="chat_history", k=500)
+    for turn in range(turns):
+        metrics_handler = SessionMetricsCallbackHandler(model=option, pricing=MODEL_PRICING.get(option))
+        error = None
+        session_client = ScheduledClient(client, scheduler, f"load-{session_id}", on_wait=metrics_handler.add_queue_wait) if scheduler else client
+        try:
+            executor = get_agent_executor_chat_bedrock_converse(option=option, memory=memory, streaming=True, thinking=False, username=f"load-{session_id}", client=session_client)
+            executor.invoke({"input": PROMPTS[(session_id + turn) % len(PROMPTS)]}, config={"callbacks": [metrics_handler]})
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)[:120]}"
+        metrics = metrics_handler.finish()
+        with lock:
+            results.append({"session": session_id, "turn": turn, "duration": metrics.duration, "ttft": metrics.ttft, "queue_wait": metrics.queue_wait, "error": error})
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def run_level(concurrency: int, turns: int, option: str, settings: StubSettings, scheduler: FairScheduler = None) -> Dict:
+    """Run `concurrency` sessions at once and summarize their turns."""
+    client = StubBedrockClient(settings)
+    results: List[Dict] = []
+    lock = threading.Lock()
+    monitor = ResourceMonitor()
+    monitor.start()
+    started = time.perf_counter()
+    sessions = [threading.Thread(target=run_session, args=(session_id, turns, option, client, results, lock, scheduler)) for session_id in range(concurrency)]
+    for session in sessions:
+        session.start()
+    for session in sessions:
+        session.join()
+    elapsed = time.perf_counter() - started
+    monitor.stop()
+
+    succeeded = [result for result in results if result["error"] is None]
+    durations = sorted(result["duration"] for result in succeeded)
+    ttfts = sorted(result["ttft"] for result in succeeded if result["ttft"] is not None)
+    errors = sorted({result["error"] for result in results if result["error"]})
+    return {
+        "concurrency": concurrency,
+        "turns": len(results),
+        "elapsed": elapsed,
+        "throughput": len(succeeded) / elapsed if elapsed else 0.0,
+        "error_rate": 1 - len(succeeded) / len(results) if results else 0.0,
+        "latency_p50": percentile(durations, 50),
+        "latency_p90": percentile(durations, 90),
+        "latency_p99": percentile(durations, 99),
+        "ttft_p50": percentile(ttfts, 50),
+        "ttft_p99": percentile(ttfts, 99),
+        "queue_wait_p99": percentile(sorted(result["queue_wait"] for result in succeeded), 99),
+        "model_requests": client.requests,
+        "throttled": client.throttled,
+        "max_in_flight": client.max_in_flight_seen,
+        "peak_threads": monitor.peak_threads,
+        "peak_rss_mb": monitor.peak_rss_mb,
+        "errors": errors[:5],
+    }
+
+
+def format_value(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+
+COLUMNS = ["concurrency", "turns", "throughput", "error_rate", "latency_p50", "latency_p90", "latency_p99", "ttft_p50", "ttft_p99", "queue_wait_p99", "throttled", "peak_threads", "peak_rss_mb"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the agent with concurrent sessions against a stub Bedrock backend")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="comma separated numbers of concurrent sessions")
+    parser.add_argument("--turns", type=int, default=3, help="turns per session")
+    parser.add_argument("--model", default=MODEL_SONNET_37, choices=AVAILABLE_MODELS)
+    parser.add_argument("--first-token-latency", type=float, default=0.5, help="seconds before the stub's first event")
+    parser.add_argument("--token-interval", type=float, default=0.01, help="seconds between streamed words")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of model requests that are throttled")
+    parser.add_argument("--max-in-flight", type=int, default=0, help="throttle model requests above this many in flight, 0 for no limit")
+    parser.add_argument("--tool-rate", type=float, default=0.5, help="share of turns that call search_ordo_tool before answering")
+    parser.add_argument("--fair-scheduling", action="store_true", help="send the model calls through a FairScheduler, as main.py does")
+    parser.add_argument("--output", help="also write the report as JSON to this file")
+    args = parser.parse_args()
+
+    settings = StubSettings(args.first_token_latency, args.token_interval, args.throttle_rate, args.max_in_flight, args.tool_rate)
+    report = []
+    print("  ".join(f"{column:>12}" for column in COLUMNS))
+    for concurrency in (int(level) for level in args.concurrency.split(",")):
+        level = run_level(concurrency, args.turns, args.model, settings, FairScheduler() if args.fair_scheduling else None)
+        report.append(level)
+        print("  ".join(f"{format_value(level[column]):>12}" for column in COLUMNS))
+        for error in level["errors"]:
+            print(f"  {error}", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "levels": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,26 @@
-from claude_bedrock import get_agent_executor_chat_bedrock_converse, MODEL_SONNET_37
-from langchain.memory import ConversationBufferWindowMemory
+from claude_bedrock import bedrock_client, get_agent_executor_chat_bedrock_converse, MODEL_SONNET_37, MODEL_PRICING, AVAILABLE_MODELS, THINKING_BUDGET_TOKENS
+from thinking_budget import choose_thinking_budget
+from response_cache import ResponseCache, is_cacheable_turn
+from datetime import datetime
+from model_router import ModelRouter, MODEL_AUTO
+from agent_worker import AgentWorkerPool, AgentJob
+from turn_budget import TurnBudget, TurnController
+from background_turn import BackgroundTurn, TurnRegistry
+from callback_recorder import CallbackRecorder
+from tool_markitdown import convert_document
+from startup_profiler import warm_up
+from bedrock_scheduler import FairScheduler, ScheduledClient
+from intent_fast_path import match_intent
+from tool_selection import ALL_TOOLS, select_tools
+import os
+from history_normalization import QUESTION_KEY, NormalizedWindowMemory, split_content
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_community.chat_message_histories import StreamlitChatMessageHistory
-from langchain_community.callbacks.streamlit.streamlit_callback_handler import StreamlitCallbackHandler
+from progress_callback_handler import ProgressStreamlitCallbackHandler
 from streaming_response_callback_handler import StreamingResponseCallbackHandler
+from session_metrics_callback_handler import SessionMetricsCallbackHandler, SessionMetrics, TurnMetrics
 
 # disable warnings
 import warnings
@@ -17,7 +33,7 @@ if "memory" not in st.session_state:
     msgs = StreamlitChatMessageHistory(key="chat_messages")
     if not msgs.messages:
         msgs.add_ai_message("How can I help you?")
-    st.session_state.memory = ConversationBufferWindowMemory(
+    st.session_state.memory = NormalizedWindowMemory(
         chat_memory=msgs, return_messages=True, memory_key="chat_history", k=500
     )
 
@@ -25,16 +41,76 @@ if "selected_model" not in st.session_state:
     st.session_state.selected_model = "Sonnet 3.7:1.0"
 if "username" not in st.session_state:
     st.session_state.username = "Guest"
+if "session_metrics" not in st.session_state:
+    st.session_state.session_metrics = SessionMetrics()
+if "last_turn_metrics" not in st.session_state:
+    st.session_state.last_turn_metrics = None
+if "documents" not in st.session_state:
+    st.session_state.documents = {}
 
-# Initialize agent executor
-agent_executor = get_agent_executor_chat_bedrock_converse(
-    option=st.session_state.selected_model,
-    memory=st.session_state.memory,
-    max_iterations=25,
-    streaming=True,
-    thinking=True,
-    username=st.session_state.username,
-)
+UPLOAD_DIR = "uploads"
+
+
+
+def build_agent_executor(option: str, model_id: str = None, client=None, thinking_budget: int = THINKING_BUDGET_TOKENS, controller: TurnController = None, on_queue_wait=None, tools: list = ALL_TOOLS):
+    """Create the agent executor for the current session, optionally pinned to a routed model ID and client.
+
+    Its model calls go through the fair scheduler as calls of the session's user.
+    """
+    client = ScheduledClient(client or bedrock_client, get_scheduler(), st.session_state.username, on_wait=on_queue_wait)
+    return get_agent_executor_chat_bedrock_converse(
+        option=option,
+        memory=st.session_state.memory,
+        max_iterations=25,
+        streaming=True,
+        thinking=thinking_budget > 0,
+        username=st.session_state.username,
+        model_id=model_id,
+        client=client,
+        thinking_budget=thinking_budget,
+        controller=controller,
+        tools=tools,
+    )
+
+
+@st.cache_resource
+def get_model_router() -> ModelRouter:
+    """One router per server process, so latency observations are shared by all sessions."""
+    return ModelRouter()
+
+
+@st.cache_resource
+def get_scheduler() -> FairScheduler:
+    """One scheduler per server process, so it sees the model calls of all sessions."""
+    return FairScheduler()
+
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    """Answers are shared by all sessions of the server process."""
+    return ResponseCache()
+
+@st.cache_resource
+def get_worker_pool() -> AgentWorkerPool:
+    """Worker processes shared by all sessions of the server process."""
+    return AgentWorkerPool()
+
+@st.cache_resource(show_spinner="Warming up...")
+def warm_up_process() -> dict:
+    """Warm-up once per server process; returns the seconds per step for the startup report."""
+    return warm_up([bedrock_client, get_model_router().client])
+
+@st.cache_resource
+def get_turn_registry() -> TurnRegistry:
+    """Running turns of all sessions, so a Stop click in a new script run reaches the turn of an earlier one."""
+    return TurnRegistry()
+
+def session_id() -> str:
+    return get_script_run_ctx().session_id
+
+def stop_turn():
+    """Cancel the running turn of this session."""
+    get_turn_registry().cancel(session_id())
 
 # Page config
 st.set_page_config(page_title="Bot", page_icon=":bot:", layout="wide")
@@ -44,52 +120,207 @@ st.sidebar.title("Settings")
 username_input = st.sidebar.text_input("Enter your name", value="Dennis")
 if st.sidebar.button("Set Username"):
     st.session_state.username = username_input
-    agent_executor = get_agent_executor_chat_bedrock_converse(
-        option=st.session_state.selected_model,
-        memory=st.session_state.memory,
-        max_iterations=25,
-        streaming=True,
-        thinking=True,
-        username=st.session_state.username,
-    )
 
-model_options = ["Sonnet 3.7:1.0", "Sonnet 3.5:2.0", "Sonnet 3.5:1.0"]
+model_options = [*AVAILABLE_MODELS, MODEL_AUTO]
 selected_model = st.sidebar.selectbox("Select a model", model_options)
 if st.sidebar.button("Apply Model"):
     st.session_state.selected_model = selected_model
-    agent_executor = get_agent_executor_chat_bedrock_converse(
-        option=st.session_state.selected_model,
-        memory=st.session_state.memory,
-        max_iterations=25,
-        streaming=True,
-        thinking=True,
-        username=st.session_state.username,
-    )
+
+use_response_cache = st.sidebar.toggle("Use response cache", value=True, help="Answer repeated questions about today's liturgy from a cache instead of calling the model")
+use_workers = st.sidebar.toggle("Run in worker processes", value=False, help="Run agent turns in a pool of worker processes and stream the tokens back to this page")
+record_turns = st.sidebar.toggle("Record turns", value=False, help="Write the callback events of each turn to recordings/ for replay_app.py")
+use_fast_path = st.sidebar.toggle("Intent fast path", value=True, help="Answer simple calendar questions (today's gospel, tomorrow's color, the Sunday cycle of a year) from the ordo without calling the model")
+select_tools_per_turn = st.sidebar.toggle("Select tools per turn", value=True, help="Bind only the tools the question needs (liturgy, documents, code, web) instead of all of them, for fewer input tokens")
+adaptive_thinking = st.sidebar.toggle("Adaptive thinking", value=True, help="Skip extended thinking for short conversational turns and use a larger budget for multi-step questions")
+
+with st.sidebar.expander("Turn budget"):
+    max_turn_seconds = st.number_input("Max seconds", min_value=0, value=300, step=30, help="0 for no limit")
+    max_turn_tokens = st.number_input("Max tokens", min_value=0, value=200_000, step=10_000, help="Input plus output tokens over all model calls of a turn, 0 for no limit")
+    max_turn_tool_calls = st.number_input("Max tool calls", min_value=0, value=15, step=1, help="0 for no limit")
+st.sidebar.button("Stop", on_click=stop_turn, help="Stop the running turn and keep the partial answer")
+
+uploaded_file = st.sidebar.file_uploader("Upload a document", help="PDF, Word, PowerPoint, Excel, HTML, ... the assistant can read it with its document tools")
+if uploaded_file is not None and uploaded_file.name not in st.session_state.documents:
+    session_upload_dir = os.path.join(UPLOAD_DIR, session_id())  # same-named uploads of other sessions must not overwrite this one
+    os.makedirs(session_upload_dir, exist_ok=True)
+    path = os.path.join(session_upload_dir, os.path.basename(uploaded_file.name))
+    with open(path, "wb") as f:
+        f.write(uploaded_file.getbuffer())
+    with st.sidebar, st.spinner("Converting..."):
+        try:
+            document = convert_document(path)
+            st.session_state.documents[uploaded_file.name] = f"{document['source']} (document_id {document['document_id']}, {len(document['chunks'])} chunks)"
+        except Exception as e:
+            st.error(f"Could not convert {uploaded_file.name}: {e}")
+for description in st.session_state.documents.values():
+    st.sidebar.caption(description)
 
 st.sidebar.metric("History Size", len(st.session_state.memory.chat_memory.messages))
 
+
+def format_seconds(value) -> str:
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def render_metrics_panel(container, session: SessionMetrics, turn: TurnMetrics = None):
+    """Render the latency and cost panel for the last (or running) turn and the session."""
+    with container.container():
+        st.subheader("Latency & Cost")
+        st.caption("Last turn")
+        if turn is None:
+            st.write("No turns yet")
+        else:
+            col1, col2 = st.columns(2)
+            col1.metric("TTFT", format_seconds(turn.ttft))
+            col2.metric("Turn time", format_seconds(turn.duration))
+            col1.metric("Input tokens", turn.input_tokens)
+            col2.metric("Output tokens", turn.output_tokens)
+            col1.metric("Cached tokens", turn.cache_read_tokens)
+            col2.metric("Tool calls", turn.tool_calls)
+            col1.metric("Queue wait", format_seconds(turn.queue_wait))
+            col2.metric("Est. cost", f"${turn.cost:.4f}")
+        st.caption(f"Session ({session.turns} turns, {session.cache_hits} from cache, {session.fast_paths} from the fast path)")
+        col1, col2 = st.columns(2)
+        col1.metric("Avg TTFT", format_seconds(session.avg_ttft))
+        col2.metric("Total time", format_seconds(session.total_time))
+        col1.metric("Input tokens", session.input_tokens)
+        col2.metric("Output tokens", session.output_tokens)
+        col1.metric("Cached tokens", session.cache_read_tokens)
+        col2.metric("Tool calls", session.tool_calls)
+        col1.metric("Queue wait", format_seconds(session.queue_wait))
+        col2.metric("Est. cost", f"${session.cost:.4f}")
+
+
+metrics_area = st.sidebar.empty()
+render_metrics_panel(metrics_area, st.session_state.session_metrics, st.session_state.last_turn_metrics)
+
+if st.session_state.selected_model == MODEL_AUTO:
+    with st.sidebar.expander("Routing decisions"):
+        for decision in reversed(list(get_model_router().decisions)[-10:]):
+            st.caption(f"complexity {decision.complexity:.2f} → {decision.chosen or 'failed'}")
+            for attempt in decision.attempts:
+                st.text(f"{attempt['model_id']}: {attempt['status']} ttft={format_seconds(attempt['ttft'])} latency={format_seconds(attempt['latency'])}" + (f" {attempt['error']}" if attempt['error'] else ""))
+
 # Main UI
 st.title("VIC-20 Human Assistant")
 chat_container = st.container()
 
+# A turn started by an interrupted script run (e.g. by the Stop button) is still running, wait for its answer
+running_turn = get_turn_registry().get(session_id())
+if running_turn is not None:
+    with st.spinner("Finishing the running turn..."):
+        running_turn.wait()
+
 # Display initial chat history
 with chat_container:
     for msg in st.session_state.memory.chat_memory.messages:
-        if msg.type == "ai" and isinstance(msg.content, list):
-            pass
-        else:
-            with st.chat_message(msg.type):
-                st.markdown(msg.content)
+        text, reasoning = split_content(msg.content)
+        reasoning = msg.additional_kwargs.get("reasoning", reasoning)
+        with st.chat_message(msg.type):
+            if reasoning:
+                with st.expander("Reasoning"):
+                    st.markdown(reasoning)
+            st.markdown(text)
 
 # User input
 user_query = st.chat_input("Your message")
+startup_report = warm_up_process()  # after the first paint, before the first turn
+with st.sidebar.expander("Startup"):
+    for step, seconds in startup_report.items():
+        st.text(f"{step}: {format_seconds(seconds)}")
 if user_query is not None and user_query != "":
     with chat_container:
         with st.chat_message("user"):
             st.markdown(user_query)
         with st.chat_message("assistant"):
             with st.spinner("Thinking..."):
-                st_callback = StreamlitCallbackHandler(parent_container=st.container(), expand_new_thoughts=True, max_thought_containers=10, collapse_completed_thoughts=True)
+                st_callback = ProgressStreamlitCallbackHandler(parent_container=st.container(), expand_new_thoughts=True, max_thought_containers=10, collapse_completed_thoughts=True)
                 stream_handler = StreamingResponseCallbackHandler(thinking_area=st.empty(), text_area=st.empty())
-                agent_executor.invoke({"input": user_query}, config={"callbacks": [stream_handler, st_callback]})
-    st.session_state.memory.save_context({"input": user_query}, {"output": stream_handler.text})
\ No newline at end of file
+                metrics_handler = SessionMetricsCallbackHandler(
+                    model=st.session_state.selected_model,
+                    pricing=MODEL_PRICING.get(st.session_state.selected_model),
+                    on_update=lambda turn: render_metrics_panel(metrics_area, st.session_state.session_metrics, turn),
+                )
+
+                agent_input = user_query
+                if st.session_state.documents:
+                    agent_input += "\n\n[Uploaded documents: " + "; ".join(st.session_state.documents.values()) + "]"
+
+                def on_attempt(option: str, model_id: str, attempt: int):
+                    metrics_handler.turn.model = option
+                    metrics_handler.pricing = MODEL_PRICING.get(option)
+                    if attempt > 0:
+                        stream_handler.reset()
+
+                thinking_budget = choose_thinking_budget(user_query) if adaptive_thinking else THINKING_BUDGET_TOKENS
+                budget = TurnBudget(max_turn_seconds or None, max_turn_tokens or None, max_turn_tool_calls or None)
+                controller = TurnController(budget)
+                recorder = CallbackRecorder(model=st.session_state.selected_model, input=user_query) if record_turns else None
+                callbacks = [metrics_handler, stream_handler, st_callback, *([recorder] if recorder else [])]
+                liturgical_date = datetime.now().strftime("%Y-%m-%d")
+                cached_answer = get_response_cache().lookup(user_query, st.session_state.selected_model, liturgical_date) if use_response_cache else None
+                # Only answers to the first question of a conversation are stored, later questions may depend on the history
+                first_question = len(st.session_state.memory.chat_memory.messages) <= 1
+                intent = match_intent(user_query) if use_fast_path and cached_answer is None else None
+                if intent is not None and not intent.direct:
+                    agent_input = intent.agent_input(agent_input)
+                previous_tool_names = st.session_state.last_turn_metrics.tool_names if st.session_state.last_turn_metrics else []
+                turn_tools = select_tools(user_query, previous_tool_names, bool(st.session_state.documents)) if select_tools_per_turn else ALL_TOOLS
+                memory = st.session_state.memory
+
+                def run_turn(turn: BackgroundTurn) -> str:
+                    """The agent part of the turn, in its own thread; UI updates go through the turn's event queue."""
+                    config = {"callbacks": [turn.callback_handler, controller]}  # the controller raises, so it goes last
+                    post_attempt = lambda option, model_id, attempt: turn.post(on_attempt, option, model_id, attempt)
+                    post_queue_wait = lambda seconds: turn.post(metrics_handler.add_queue_wait, seconds)
+                    if use_workers:
+                        job = AgentJob(
+                            input=agent_input,
+                            option=st.session_state.selected_model,
+                            username=st.session_state.username,
+                            thinking_budget=thinking_budget,
+                            history=AgentJob.serialize_history(memory.chat_memory.messages),
+                            budget=budget,
+                            tool_names=[tool.name for tool in turn_tools],
+                        )
+                        answer = get_worker_pool().run(job, [turn.callback_handler], on_attempt=post_attempt, controller=controller, scheduler=get_scheduler(), on_queue_wait=post_queue_wait)
+                        memory.save_context({"input": user_query}, {"output": answer})
+                        return answer
+                    if st.session_state.selected_model == MODEL_AUTO:
+                        result = get_model_router().invoke(
+                            user_query,
+                            lambda option, model_id, client: build_agent_executor(option, model_id, client, thinking_budget, controller, post_queue_wait, turn_tools),
+                            {"input": agent_input, QUESTION_KEY: user_query},
+                            config=config,
+                            on_attempt=post_attempt,
+                        )
+                    else:
+                        result = build_agent_executor(st.session_state.selected_model, thinking_budget=thinking_budget, controller=controller, on_queue_wait=post_queue_wait, tools=turn_tools).invoke({"input": agent_input, QUESTION_KEY: user_query}, config=config)
+                    return result["output"]
+
+                saved_by_turn = False  # the background turn saves itself to memory, also when this script run is interrupted
+                try:
+                    if cached_answer is not None:
+                        metrics_handler.turn.cache_hit = True
+                        for handler in (metrics_handler, stream_handler, *([recorder] if recorder else [])):
+                            handler.on_llm_new_token([{"type": "text", "text": cached_answer}])
+                    elif intent is not None and intent.direct:
+                        metrics_handler.turn.fast_path = True
+                        for handler in (metrics_handler, stream_handler, *([recorder] if recorder else [])):
+                            handler.on_llm_new_token([{"type": "text", "text": intent.answer}])
+                    else:
+                        turn = BackgroundTurn(run_turn, controller)
+                        add_script_run_ctx(turn.thread)  # the turn reads the session state of this session
+                        saved_by_turn = True
+                        get_turn_registry().start(session_id(), turn).replay(callbacks)
+                finally:
+                    if recorder:
+                        recorder.close()
+                    turn_metrics = metrics_handler.finish()
+                    st.session_state.session_metrics.add_turn(turn_metrics)
+                    st.session_state.last_turn_metrics = turn_metrics
+                    render_metrics_panel(metrics_area, st.session_state.session_metrics, turn_metrics)
+    if not saved_by_turn:
+        st.session_state.memory.save_context({"input": user_query}, {"output": stream_handler.text})
+    if use_response_cache and first_question and not turn_metrics.cache_hit and not turn_metrics.fast_path and not controller.interrupted and not controller.cancelled and is_cacheable_turn(turn_metrics.tool_names):
+        get_response_cache().store(user_query, st.session_state.selected_model, liturgical_date, stream_handler.text, st.session_state.username)
\ No newline at end of file
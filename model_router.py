@@ -0,0 +1,244 @@
+import itertools
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError, ConnectTimeoutError, ReadTimeoutError
+from langchain.agents import AgentExecutor
+from claude_bedrock import AVAILABLE_MODELS, MODEL_PRICING, MODEL_SONNET_37, MODEL_SONNET_35_V2, MODEL_SONNET_35_V1, get_model_ids_for_option, get_bedrock_client
+from session_metrics_callback_handler import SessionMetricsCallbackHandler, estimate_cost
+
+# Option name for the sidebar that lets the router pick the model per turn
+MODEL_AUTO = "Auto"
+
+# Relative answer quality of the models, higher is better
+MODEL_QUALITY = {MODEL_SONNET_37: 3, MODEL_SONNET_35_V2: 2, MODEL_SONNET_35_V1: 1}
+
+# Seconds allowed between two socket reads of a response, i.e. also between streamed events;
+# generous, since extended thinking can pause the stream well beyond the first-token timeout
+STREAM_READ_TIMEOUT = int(os.environ.get("BEDROCK_STREAM_READ_TIMEOUT", 300))
+
+# Bedrock error codes after which another model or inference profile is tried
+FAILOVER_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelTimeoutException",
+    "ModelNotReadyException",
+}
+
+COMPLEX_HINTS = re.compile(
+    r"\b(why|how|explain|compare|analy[sz]e|calculate|compute|code|script|run|execute|month|year|readings?|gospel|"
+    r"liturgy|fetch|download|http|url|api|steps?|plan|prove|derive|summari[sz]e|list all)\b",
+    re.IGNORECASE,
+)
+
+
+def estimate_complexity(query: str) -> float:
+    """Cheap 0..1 estimate of how much reasoning and tool use a query needs."""
+    words = len(query.split())
+    score = min(words / 80, 1.0) * 0.5
+    score += min(len(COMPLEX_HINTS.findall(query)) * 0.15, 0.4)
+    if "```" in query or query.count("?") > 1:
+        score += 0.1
+    return min(score, 1.0)
+
+
+def estimate_turn_cost(option: str, query: str, complexity: float) -> float:
+    """Rough USD cost of a turn: system prompt plus query in, an answer that grows with complexity out."""
+    input_tokens = 3000 + len(query) // 4
+    output_tokens = int(300 + 1500 * complexity)
+    return estimate_cost(MODEL_PRICING.get(option, {}), input_tokens, output_tokens)
+
+
+class FirstTokenTimeout(Exception):
+    """The first event of a model stream did not arrive within the first-token timeout."""
+
+
+class FirstTokenDeadlineClient:
+    """A bedrock-runtime client whose converse_stream raises FirstTokenTimeout when the first event takes too long.
+
+    botocore's read timeout bounds every socket read, so it cannot tell a slow start from a
+    long thinking pause mid-stream. The call and the first event are awaited in a thread
+    instead; after that the stream is only bounded by the client's read timeout.
+    """
+
+    def __init__(self, client, timeout: float):
+        self.client = client
+        self.timeout = timeout
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def converse_stream(self, **kwargs) -> Dict:
+        result = {}
+        done = threading.Event()
+        abandoned = threading.Event()
+
+        def start():
+            try:
+                response = self.client.converse_stream(**kwargs)
+                events = iter(response["stream"])
+                result["response"] = response, next(events, None), events
+            except Exception as e:
+                result["error"] = e
+            done.set()
+            if abandoned.is_set() and "response" in result:
+                result["response"][0]["stream"].close()
+
+        threading.Thread(target=start, daemon=True).start()
+        if not done.wait(self.timeout):
+            abandoned.set()
+            raise FirstTokenTimeout(f"no stream event within {self.timeout}s")
+        if "error" in result:
+            raise result["error"]
+        response, first, events = result["response"]
+        return {**response, "stream": itertools.chain([first] if first is not None else [], events)}
+
+
+def is_failover_error(error: Exception) -> bool:
+    """True for throttling, unavailability and first-token timeouts, where another model may succeed."""
+    if isinstance(error, (FirstTokenTimeout, ReadTimeoutError, ConnectTimeoutError)):
+        return True
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") in FAILOVER_ERROR_CODES
+    # exceptions inside the event stream are raised by langchain_aws as ValueError
+    message = str(error).lower()
+    return isinstance(error, ValueError) and "received aws exception" in message and any(
+        code.lower() in message for code in FAILOVER_ERROR_CODES | {"modelStreamErrorException"}
+    )
+
+
+@dataclass
+class ModelStats:
+    """Observed latency of a model, as exponentially weighted moving averages."""
+    calls: int = 0
+    failures: int = 0
+    ewma_latency: Optional[float] = None
+    ewma_ttft: Optional[float] = None
+    penalized_until: float = 0.0
+
+
+@dataclass
+class RoutingDecision:
+    query: str
+    complexity: float
+    candidates: List[Tuple[str, str]]
+    timestamp: float = field(default_factory=time.time)
+    attempts: List[Dict] = field(default_factory=list)
+
+    @property
+    def chosen(self) -> Optional[str]:
+        """The option that answered the turn, if any attempt succeeded."""
+        for attempt in self.attempts:
+            if attempt["status"] == "ok":
+                return attempt["option"]
+        return None
+
+
+class ModelRouter:
+    """Picks a model per turn from AVAILABLE_MODELS and fails over on throttling or first-token timeouts.
+
+    Complex queries go to the best model, simple ones to the model with the lowest observed
+    latency. Models over the latency or cost budget are skipped, and a model that was throttled
+    is moved to the back of the line for ``penalty_seconds``. Every decision is kept, together
+    with the observed TTFT and latency of each attempt, in ``decisions``.
+    """
+
+    def __init__(self, models: List[str] = None, latency_budget: float = None, cost_budget: float = None, first_token_timeout: int = 20, complexity_threshold: float = 0.5, penalty_seconds: float = 60.0, max_attempts: int = 3, alpha: float = 0.3):
+        self.models = models or list(AVAILABLE_MODELS)
+        self.latency_budget = latency_budget
+        self.cost_budget = cost_budget
+        self.first_token_timeout = first_token_timeout
+        self.complexity_threshold = complexity_threshold
+        self.penalty_seconds = penalty_seconds
+        self.max_attempts = max_attempts
+        self.alpha = alpha
+        self.stats: Dict[str, ModelStats] = {option: ModelStats() for option in self.models}
+        self.decisions = deque(maxlen=200)
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """Bedrock client that fails a model call fast when its first streamed event takes longer than the first-token timeout."""
+        if self._client is None:
+            self._client = FirstTokenDeadlineClient(get_bedrock_client(read_timeout=STREAM_READ_TIMEOUT), self.first_token_timeout)
+        return self._client
+
+    def _order_key(self, option: str, complex_query: bool):
+        stats = self.stats[option]
+        penalized = stats.penalized_until > time.time()
+        if complex_query:
+            return (penalized, -MODEL_QUALITY.get(option, 0))
+        # models without observations sort first (in configured order) so each one gets sampled
+        latency = stats.ewma_latency if stats.ewma_latency is not None else 0.0
+        return (penalized, latency, self.models.index(option))
+
+    def route(self, query: str) -> RoutingDecision:
+        """Order the models for a query, best candidate first."""
+        complexity = estimate_complexity(query)
+        with self._lock:
+            options = list(self.models)
+            if self.cost_budget is not None:
+                options = [o for o in options if estimate_turn_cost(o, query, complexity) <= self.cost_budget] or options
+            if self.latency_budget is not None:
+                options = [o for o in options if (self.stats[o].ewma_latency or 0.0) <= self.latency_budget] or options
+            complex_query = complexity >= self.complexity_threshold
+            options.sort(key=lambda o: self._order_key(o, complex_query))
+        candidates = [(option, model_id) for option in options for model_id in get_model_ids_for_option(option)]
+        return RoutingDecision(query=query, complexity=complexity, candidates=candidates)
+
+    def record(self, decision: RoutingDecision, option: str, model_id: str, status: str, ttft: Optional[float], latency: float, error: str = None):
+        """Record the outcome of an attempt and update the latency averages of the model."""
+        decision.attempts.append({"option": option, "model_id": model_id, "status": status, "ttft": ttft, "latency": latency, "error": error})
+        with self._lock:
+            stats = self.stats[option]
+            stats.calls += 1
+            if status == "ok":
+                stats.ewma_latency = latency if stats.ewma_latency is None else self.alpha * latency + (1 - self.alpha) * stats.ewma_latency
+                if ttft is not None:
+                    stats.ewma_ttft = ttft if stats.ewma_ttft is None else self.alpha * ttft + (1 - self.alpha) * stats.ewma_ttft
+            else:
+                stats.failures += 1
+                if status == "failover":
+                    stats.penalized_until = time.time() + self.penalty_seconds
+
+    def invoke(self, query: str, build_executor: Callable[[str, str, object], AgentExecutor], inputs: Dict, config: Dict = None, on_attempt: Callable[[str, str, int], None] = None) -> Dict:
+        """Run a turn on the routed model, failing over to the next candidate when it is throttled or times out.
+
+        Only attempts that have not run a tool yet fail over: retrying a turn would run its tools,
+        and their side effects, a second time.
+
+        ``build_executor(option, model_id, client)`` creates the agent executor for an attempt and
+        ``on_attempt(option, model_id, attempt)`` is called before each attempt, so the caller can
+        reset output that was streamed by a failed attempt.
+        """
+        config = dict(config or {})
+        callbacks = list(config.get("callbacks") or [])
+        decision = self.route(query)
+        self.decisions.append(decision)
+        last_error = None
+        for attempt, (option, model_id) in enumerate(decision.candidates[:self.max_attempts]):
+            if on_attempt:
+                on_attempt(option, model_id, attempt)
+            timer = SessionMetricsCallbackHandler(model=option)
+            try:
+                executor = build_executor(option, model_id, self.client)
+                result = executor.invoke(inputs, config={**config, "callbacks": [timer, *callbacks]})
+            except Exception as e:
+                turn = timer.finish()
+                if not is_failover_error(e) or turn.tool_calls > 0:
+                    self.record(decision, option, model_id, "error", turn.ttft, turn.duration, f"{type(e).__name__}: {e}")
+                    raise
+                self.record(decision, option, model_id, "failover", turn.ttft, turn.duration, f"{type(e).__name__}: {e}")
+                last_error = e
+                continue
+            turn = timer.finish()
+            self.record(decision, option, model_id, "ok", turn.ttft, turn.duration)
+            return result
+        raise last_error
@@ -0,0 +1,179 @@
+"""
+Columnar form of the ordo for vectorized queries.
+
+Each day is a row: the date as an int32 ordinal, color, season, weekday and psalter week
+as uint8 enum codes, the ranks of its celebrations as a uint8 bit mask and its readings
+as int32 indexes into a table of references. Celebrations are stored once per
+celebration (day row, title index, rank code) next to a table of unique titles.
+
+A query is a conjunction of filters evaluated as boolean masks over whole columns, e.g.
+red days in the Easter season, or memorials on Saturdays.
+"""
+import json
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+from langchain_core.tools import tool
+
+from bible_reference import parse_reference
+from tool_catholic_liturgy import ORDO_2025
+
+COLORS = ["green", "white", "violet", "red", "rose", "black"]
+SEASONS = ["Advent", "Christmas", "Lent", "Easter", "Ordinary Time"]
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+RANKS = ["weekday", "optional memorial", "memorial", "feast", "solemnity", "sunday"]
+PSALTER_WEEKS = [None, "I", "II", "III", "IV", "Prop"]
+READING_KEYS = ["first_reading", "second_reading", "gospel"]
+UNKNOWN = 255
+
+# Query values people (and the model) use for the enum values
+ALIASES = {"purple": "violet", "ordinary": "Ordinary Time", "optional": "optional memorial"}
+
+Values = Union[str, Iterable[str], None]
+
+
+def encode(values: List, value) -> int:
+    return values.index(value) if value in values else UNKNOWN
+
+
+def _as_list(value: Values) -> List[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [ALIASES.get(item.strip().lower(), item.strip()) for item in value if item.strip()]
+
+
+def _codes(values: List[str], requested: Values) -> np.ndarray:
+    lookup = {value.lower(): code for code, value in enumerate(values) if value is not None}
+    codes = []
+    for item in _as_list(requested):
+        if item.lower() not in lookup:
+            raise ValueError(f"Unknown value {item!r}, expected one of {[value for value in values if value]}")
+        codes.append(lookup[item.lower()])
+    return np.array(codes, dtype=np.uint8)
+
+
+class OrdoColumns:
+    def __init__(self, ordo: List[Dict]):
+        self.ordo = ordo
+        n = len(ordo)
+        self.ordinal = np.empty(n, dtype=np.int32)
+        self.month = np.empty(n, dtype=np.uint8)
+        self.color = np.empty(n, dtype=np.uint8)
+        self.season = np.empty(n, dtype=np.uint8)
+        self.weekday = np.empty(n, dtype=np.uint8)
+        self.psalter_week = np.empty(n, dtype=np.uint8)
+        self.rank_mask = np.zeros(n, dtype=np.uint8)
+        self.readings = np.full((n, len(READING_KEYS)), -1, dtype=np.int32)
+        self.titles: List[str] = []
+        self.references: List[str] = []
+        title_index: Dict[str, int] = {}
+        reference_index: Dict[str, int] = {}
+        celebration_day, celebration_title, celebration_rank = [], [], []
+
+        for row, entry in enumerate(ordo):
+            day = date.fromisoformat(entry["date"])
+            self.ordinal[row] = day.toordinal()
+            self.month[row] = day.month
+            self.color[row] = encode(COLORS, entry.get("color"))
+            self.season[row] = encode(SEASONS, entry.get("season"))
+            self.weekday[row] = encode(WEEKDAYS, entry.get("weekday"))
+            self.psalter_week[row] = encode(PSALTER_WEEKS, entry.get("readings", {}).get("psalm"))
+            for celebration in entry.get("celebrations", []):
+                rank = encode(RANKS, celebration.get("rank"))
+                if rank != UNKNOWN:
+                    self.rank_mask[row] |= 1 << rank
+                celebration_day.append(row)
+                celebration_title.append(title_index.setdefault(celebration["title"], len(title_index)))
+                celebration_rank.append(rank)
+            for column, key in enumerate(READING_KEYS):
+                reference = entry.get("readings", {}).get(key)
+                if reference:
+                    self.readings[row, column] = reference_index.setdefault(reference, len(reference_index))
+
+        self.titles = list(title_index)
+        self.references = list(reference_index)
+        self.celebration_day = np.array(celebration_day, dtype=np.int32)
+        self.celebration_title = np.array(celebration_title, dtype=np.int32)
+        self.celebration_rank = np.array(celebration_rank, dtype=np.uint8)
+        self.titles_lower = [title.lower() for title in self.titles]
+        # Bible book of every reference, e.g. 'Isaiah' for 'Is 55:1-3, 6-9'
+        self.reference_books = [ranges[0].book.lower() if ranges else "" for ranges in map(parse_reference, self.references)]
+
+    def _any_celebration(self, matches: np.ndarray) -> np.ndarray:
+        """Day mask from a per-celebration mask: days with at least one matching celebration."""
+        mask = np.zeros(len(self.ordo), dtype=bool)
+        np.logical_or.at(mask, self.celebration_day, matches)
+        return mask
+
+    def _any_reading(self, table_matches: np.ndarray) -> np.ndarray:
+        """Day mask from a per-reference mask: days with at least one matching reading."""
+        lookup = np.append(table_matches, False)  # index -1 (no reading) maps to the appended False
+        return lookup[self.readings].any(axis=1)
+
+    def mask(self, color: Values = None, season: Values = None, weekday: Values = None, rank: Values = None,
+             month: Optional[int] = None, start_date: Optional[str] = None, end_date: Optional[str] = None,
+             title: Optional[str] = None, book: Optional[str] = None, psalter_week: Values = None) -> np.ndarray:
+        """Boolean mask of the days matching all given filters; lists (or comma separated strings) match any value."""
+        mask = np.ones(len(self.ordo), dtype=bool)
+        if color:
+            mask &= np.isin(self.color, _codes(COLORS, color))
+        if season:
+            mask &= np.isin(self.season, _codes(SEASONS, season))
+        if weekday:
+            mask &= np.isin(self.weekday, _codes(WEEKDAYS, [item[:3] for item in _as_list(weekday)]))
+        if psalter_week:
+            mask &= np.isin(self.psalter_week, _codes(PSALTER_WEEKS, psalter_week))
+        if rank:
+            bits = np.uint8(sum(1 << int(code) for code in _codes(RANKS, rank)))
+            mask &= (self.rank_mask & bits) != 0
+        if month:
+            mask &= self.month == month
+        if start_date:
+            mask &= self.ordinal >= date.fromisoformat(start_date).toordinal()
+        if end_date:
+            mask &= self.ordinal <= date.fromisoformat(end_date).toordinal()
+        if title:
+            needle = title.lower()
+            title_matches = np.array([needle in candidate for candidate in self.titles_lower], dtype=bool)
+            mask &= self._any_celebration(title_matches[self.celebration_title])
+        if book:
+            needle = book.lower()
+            mask &= self._any_reading(np.array([needle == candidate for candidate in self.reference_books], dtype=bool))
+        return mask
+
+    def query(self, limit: Optional[int] = None, **filters) -> List[Dict]:
+        """Ordo entries of the days matching the filters (see mask), in date order."""
+        rows = np.flatnonzero(self.mask(**filters))
+        return [self.ordo[row] for row in rows[:limit]]
+
+    def count(self, **filters) -> int:
+        return int(self.mask(**filters).sum())
+
+
+ORDO_COLUMNS = OrdoColumns(ORDO_2025)
+
+
+@tool
+def query_ordo_tool(color: str = "", season: str = "", weekday: str = "", rank: str = "", month: int = 0,
+                    title: str = "", book: str = "", start_date: str = "", end_date: str = "", limit: int = 50) -> str:
+    """Filter the days of the 2025 liturgical calendar; all given filters must match. Returns JSON with the count and the days.
+       color: green, white, violet, red, rose; season: Advent, Christmas, Lent, Easter, Ordinary Time;
+       weekday: mon..sun; rank: weekday, optional memorial, memorial, feast, solemnity, sunday;
+       month: 1-12; title: text in a celebration title; book: full name of the Bible book of a reading, e.g. Isaiah or 1 John;
+       start_date/end_date: YYYY-MM-DD. Separate several values with commas to match any of them.
+       Examples: all red days in Easter: color="red", season="Easter"; memorials on Saturdays: rank="memorial", weekday="sat".
+    """
+    filters = dict(color=color, season=season, weekday=weekday, rank=rank, month=month, title=title, book=book, start_date=start_date, end_date=end_date)
+    try:
+        mask = ORDO_COLUMNS.mask(**filters)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    rows = np.flatnonzero(mask)
+    days = [
+        {"date": entry["date"], "weekday": entry["weekday"], "celebrations": entry["celebrations"], "color": entry["color"], "season": entry["season"], "readings": entry["readings"]}
+        for entry in (ORDO_COLUMNS.ordo[row] for row in rows[:max(limit, 0)])
+    ]
+    return json.dumps({"count": int(mask.sum()), "days": days})
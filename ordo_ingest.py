@@ -0,0 +1,275 @@
+"""
+Ingestion pipeline from a liturgical calendar PDF to the ordo JSON used by the liturgy tools.
+
+    python ordo_ingest.py 2026cal.pdf --year 2026 --output 2026_ordo.json
+
+1. Pages are converted to text in a process pool with pdfminer, the PDF backend of
+   markitdown, one page per task. Page texts are cached by the hash of the PDF.
+2. The text is parsed into the day schema of 2025_ordo.json.
+3. The days are validated: every date of the year exactly once, weekdays matching the
+   dates, known ranks, colors and seasons, and parseable reading references.
+
+A rerun on an unchanged PDF converts nothing; a rerun after a parser change only parses.
+
+The parser expects the layout of the USCCB liturgical calendar, for example:
+
+    January 2026
+    1 Thu white
+    SOLEMNITY OF MARY, THE HOLY MOTHER OF GOD
+    Nm 6:22-27/Gal 4:4-7/Lk 2:16-21 (18) Pss Prop
+    2 Fri white
+    Sts. Basil the Great and Gregory Nazianzen, Bishops and Doctors of the Church
+    Memorial
+    1 Jn 2:22-28/Jn 1:19-28 (205) Pss I
+    3 Sat white
+    Christmas Weekday
+    [The Most Holy Name of Jesus]
+    1 Jn 2:29—3:6/Jn 1:29-34 (206)
+
+Bracketed titles are optional memorials and a line with a rank (Solemnity, Feast, Memorial,
+Optional Memorial) applies to the title above it.
+"""
+import argparse
+import concurrent.futures
+import json
+import re
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from bible_reference import parse_reference
+from content_hash_cache import ContentHashCache, sha256_file, sha256_text
+
+# Bump when the parser changes, so cached parse results are not reused
+PARSER_VERSION = 1
+
+MONTHS = ["january", "february", "march", "april", "may", "june", "july", "august", "september", "october", "november", "december"]
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+RANKS = {"solemnity", "feast", "memorial", "optional memorial", "sunday", "weekday"}
+COLORS = {"white", "violet", "green", "red", "rose", "black", "gold"}
+SEASONS = {"Advent", "Christmas", "Lent", "Easter", "Ordinary Time"}
+
+MONTH_LINE = re.compile(r"^#*\s*(" + "|".join(MONTHS) + r")(?:\s+(\d{4}))?\s*$", re.IGNORECASE)
+DAY_LINE = re.compile(
+    r"^(?:(?P<day>\d{1,2})\s+(?P<weekday>mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?|(?P<weekday2>mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?\s+(?P<day2>\d{1,2}))\b\s*(?P<rest>.*)$",
+    re.IGNORECASE,
+)
+COLORS_PREFIX = re.compile(r"^((?:(?:" + "|".join(COLORS) + r")\s*(?:/|or)?\s*)+)(.*)$", re.IGNORECASE)
+RANK_LINE = re.compile(r"^(solemnity|feast|memorial|optional memorial)$", re.IGNORECASE)
+READINGS_LINE = re.compile(r"^(?P<readings>.+?/.+?)(?:\s*\((?P<lectionary>[\d/ ]+)\))?(?:\s*Pss\s+(?P<psalm>Prop|IV|III|II|I))?\s*$")
+ORDINAL_SUNDAY = re.compile(r"\b(FIRST|SECOND|THIRD|FOURTH|FIFTH|SIXTH|SEVENTH|\w+TH|\w+ST|\w+ND|\w+RD)\s+SUNDAY\b")
+WEEKDAY_TITLE = re.compile(r"^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday) (of|after|before)\b")
+SMALL_WORDS = re.compile(r"\b(The|And|Of|De)\b")
+SAINT_TITLE = re.compile(r"\b(?:Saints?|Sts?\.)\s+(.+)", re.IGNORECASE)
+
+# Titles that start a season on the same day, and titles after which a season starts the next day
+SEASON_STARTS = [("FIRST SUNDAY OF ADVENT", "Advent"), ("NATIVITY OF THE LORD", "Christmas"), ("ASH WEDNESDAY", "Lent"), ("HOLY SATURDAY", "Easter")]
+SEASON_STARTS_NEXT_DAY = [("BAPTISM OF THE LORD", "Ordinary Time"), ("PENTECOST", "Ordinary Time")]
+
+
+def extract_page(pdf_path: str, page_number: int) -> str:
+    """Text of one page (0-based); runs in a worker process."""
+    from pdfminer.high_level import extract_text
+    return extract_text(pdf_path, page_numbers=[page_number])
+
+
+def count_pages(pdf_path: str) -> int:
+    from pdfminer.pdfpage import PDFPage
+    with open(pdf_path, "rb") as f:
+        return sum(1 for _ in PDFPage.get_pages(f))
+
+
+def convert_pdf(pdf_path: str, workers: Optional[int] = None, cache: ContentHashCache = None) -> List[str]:
+    """Texts of all pages, converting only the pages that are not cached for this PDF content yet."""
+    cache = cache or ContentHashCache("pdf_pages")
+    pdf_hash = sha256_file(pdf_path)
+    pages = cache.get(f"{pdf_hash}-count")
+    if pages is None:
+        pages = count_pages(pdf_path)
+        cache.put(f"{pdf_hash}-count", pages)
+    texts = [cache.get(f"{pdf_hash}-{page}") for page in range(pages)]
+    missing = [page for page, text in enumerate(texts) if text is None]
+    if missing:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            for page, text in zip(missing, executor.map(extract_page, [pdf_path] * len(missing), missing)):
+                cache.put(f"{pdf_hash}-{page}", text)
+                texts[page] = text
+    print(f"{pdf_path}: {pages} pages, {len(missing)} converted, {pages - len(missing)} from cache")
+    return texts
+
+
+def rank_for_title(title: str, bracketed: bool) -> str:
+    if bracketed:
+        return "optional memorial"
+    if "weekday" in title.lower() or WEEKDAY_TITLE.match(title):
+        return "weekday"
+    if title.isupper():
+        return "sunday" if ORDINAL_SUNDAY.search(title) else "solemnity"
+    return "memorial"
+
+
+def saint_for_celebrations(celebrations: List[Dict]) -> Optional[str]:
+    """Name of the saint of the main celebration, e.g. 'Agnes' for 'Saint Agnes, Virgin and Martyr'."""
+    for celebration in celebrations:
+        if celebration["rank"] in ("memorial", "feast", "solemnity"):
+            match = SAINT_TITLE.search(celebration["title"])
+            if match:
+                name = re.sub(r"\s+the Apostle$", "", match.group(1).split(",")[0].strip(), flags=re.IGNORECASE)
+                return SMALL_WORDS.sub(lambda small: small.group(1).lower(), name.title()) if name.isupper() else name
+    return None
+
+
+def parse_readings(line: str) -> Optional[Dict]:
+    match = READINGS_LINE.match(line)
+    if not match:
+        return None
+    parts = [part.strip() for part in match.group("readings").split("/")]
+    if not all(parse_reference(part) for part in parts):
+        return None
+    first, *second, gospel = parts
+    return {"first_reading": first, "second_reading": second[0] if second else None, "gospel": gospel, "psalm": match.group("psalm")}
+
+
+def parse_ordo_text(text: str, year: int) -> List[Dict]:
+    """Parse calendar text (all pages, in order) into ordo days."""
+    days: List[Dict] = []
+    month = None
+    day = None
+    season = "Christmas"  # the civil year starts in the Christmas season
+    next_season = None
+
+    def finish_day():
+        if day is not None:
+            day["saint"] = saint_for_celebrations(day["celebrations"])
+            days.append(day)
+
+    for line in (line.strip() for line in text.splitlines()):
+        if not line:
+            continue
+        match = MONTH_LINE.match(line)
+        if match:
+            if match.group(2) and int(match.group(2)) != year:
+                continue
+            month = MONTHS.index(match.group(1).lower()) + 1
+            continue
+        match = DAY_LINE.match(line)
+        if match and month is not None and not parse_readings(line):
+            finish_day()
+            day_of_month = int(match.group("day") or match.group("day2"))
+            weekday = (match.group("weekday") or match.group("weekday2"))[:3].lower()
+            rest = match.group("rest").strip()
+            color = None
+            colors = COLORS_PREFIX.match(rest)
+            if colors:
+                color = re.split(r"[\s/]+", colors.group(1).strip())[0].lower()
+                rest = colors.group(2).strip()
+            if next_season:
+                season, next_season = next_season, None
+            day = {"date": f"{year}-{month:02d}-{day_of_month:02d}", "weekday": weekday, "celebrations": [], "readings": {}, "saint": None, "color": color, "season": season}
+            if rest:
+                line = rest  # the title follows the date on the same line
+            else:
+                continue
+        if day is None:
+            continue
+        readings = parse_readings(line)
+        if readings:
+            if not day["readings"]:
+                day["readings"] = readings
+            continue
+        if RANK_LINE.match(line):
+            if day["celebrations"]:
+                day["celebrations"][-1]["rank"] = line.lower()
+            continue
+        bracketed = line.startswith("[") and line.endswith("]")
+        title = line.strip("[]").strip()
+        if day["celebrations"] and not bracketed and title[:1].islower():
+            day["celebrations"][-1]["title"] += f" {title}"  # a title wrapped over two lines
+            continue
+        day["celebrations"].append({"title": title, "rank": rank_for_title(title, bracketed)})
+        for marker, starting in SEASON_STARTS:
+            if marker in title.upper():
+                season = day["season"] = starting
+        for marker, starting in SEASON_STARTS_NEXT_DAY:
+            if marker in title.upper():
+                next_season = starting
+    finish_day()
+    for entry in days:
+        entry["readings"] = entry["readings"] or {"first_reading": None, "second_reading": None, "gospel": None, "psalm": None}
+    return days
+
+
+def validate_ordo(days: List[Dict], year: int) -> List[str]:
+    """Problems with a parsed ordo; an empty list means it can replace the JSON file."""
+    problems = []
+    seen = {}
+    for entry in days:
+        date_str = entry.get("date", "")
+        if date_str in seen:
+            problems.append(f"{date_str}: duplicate day")
+        seen[date_str] = entry
+        try:
+            weekday = WEEKDAYS[date.fromisoformat(date_str).weekday()]
+        except ValueError:
+            problems.append(f"{date_str}: invalid date")
+            continue
+        if entry.get("weekday") != weekday:
+            problems.append(f"{date_str}: weekday {entry.get('weekday')} should be {weekday}")
+        if not entry.get("celebrations"):
+            problems.append(f"{date_str}: no celebration")
+        for celebration in entry.get("celebrations", []):
+            if celebration.get("rank") not in RANKS:
+                problems.append(f"{date_str}: unknown rank {celebration.get('rank')!r}")
+        if entry.get("color") not in COLORS:
+            problems.append(f"{date_str}: unknown color {entry.get('color')!r}")
+        if entry.get("season") not in SEASONS:
+            problems.append(f"{date_str}: unknown season {entry.get('season')!r}")
+        readings = entry.get("readings") or {}
+        if not readings.get("gospel"):
+            problems.append(f"{date_str}: no gospel")
+        for key in ("first_reading", "second_reading", "gospel"):
+            if readings.get(key) and not parse_reference(readings[key]):
+                problems.append(f"{date_str}: unparseable {key} {readings[key]!r}")
+    current = date(year, 1, 1)
+    while current.year == year:
+        if current.isoformat() not in seen:
+            problems.append(f"{current.isoformat()}: missing")
+        current += timedelta(days=1)
+    return problems
+
+
+def ingest(pdf_paths: List[str], year: int, workers: Optional[int] = None) -> Dict:
+    """Convert, parse and validate; returns the days and the validation problems."""
+    started = time.perf_counter()
+    texts = [text for pdf_path in pdf_paths for text in convert_pdf(pdf_path, workers)]
+    text = "\n".join(texts)
+    parsed = ContentHashCache("ordo_parsed")
+    key = sha256_text(f"{PARSER_VERSION}:{year}:{text}")
+    days = parsed.get(key)
+    if days is None:
+        days = parse_ordo_text(text, year)
+        parsed.put(key, days)
+    days.sort(key=lambda entry: entry["date"])
+    return {"days": days, "problems": validate_ordo(days, year), "elapsed": time.perf_counter() - started}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a liturgical calendar PDF into an ordo JSON file")
+    parser.add_argument("pdf", nargs="+", help="calendar PDF file(s) of one year, in order")
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--output", help="ordo JSON file, default <year>_ordo.json")
+    parser.add_argument("--workers", type=int, default=None, help="conversion processes, default the number of CPUs")
+    parser.add_argument("--force", action="store_true", help="write the output even when validation fails")
+    args = parser.parse_args()
+
+    result = ingest(args.pdf, args.year, args.workers)
+    for problem in result["problems"][:50]:
+        print(problem)
+    print(f"{len(result['days'])} days, {len(result['problems'])} problems in {result['elapsed']:.2f}s")
+    if result["problems"] and not args.force:
+        sys.exit(1)
+    output = args.output or f"{args.year}_ordo.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result["days"], f, indent=2, ensure_ascii=False)
+    print(f"written to {output}")
@@ -0,0 +1,40 @@
+from typing import Any, Dict
+from uuid import UUID
+
+from langchain_community.callbacks.streamlit.streamlit_callback_handler import StreamlitCallbackHandler
+from tool_progress import PROGRESS_EVENT
+
+
+class ProgressStreamlitCallbackHandler(StreamlitCallbackHandler):
+    """StreamlitCallbackHandler that also shows the progress events of the running tool.
+
+    The progress line and the partial results received so far are written into the
+    thought container of the tool and updated in place until the tool ends.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._progress_index = None
+        self._progress_lines = []
+
+    def _reset_progress(self):
+        self._progress_index = None
+        self._progress_lines = []
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs: Any) -> None:
+        self._reset_progress()
+        super().on_tool_start(serialized, input_str, **kwargs)
+
+    def on_tool_end(self, output: Any, **kwargs: Any) -> None:
+        self._reset_progress()
+        super().on_tool_end(output, **kwargs)
+
+    def on_custom_event(self, name: str, data: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        if name != PROGRESS_EVENT or self._current_thought is None:
+            return
+        self._progress_lines.extend(f"- {item}" for item in data.get("partial", []))
+        status = data["message"]
+        if data.get("total"):
+            status = f"{data['done']}/{data['total']} {status}"
+        body = "\n".join([f"*{status}*", *self._progress_lines])
+        self._progress_index = self._current_thought.container.markdown(body, index=self._progress_index)
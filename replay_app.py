@@ -0,0 +1,34 @@
+import os
+import sys
+import streamlit as st
+from progress_callback_handler import ProgressStreamlitCallbackHandler
+from streaming_response_callback_handler import StreamingResponseCallbackHandler
+from callback_recorder import RECORDINGS_DIR, read_metadata, replay
+
+# Replays recorded turns into the same handlers as main.py, to profile UI rendering:
+#   streamlit run replay_app.py [-- recordings/<file>.jsonl]
+
+st.set_page_config(page_title="Replay", page_icon=":bot:", layout="wide")
+
+st.sidebar.title("Replay")
+recordings = sorted(os.listdir(RECORDINGS_DIR), reverse=True) if os.path.isdir(RECORDINGS_DIR) else []
+paths = sys.argv[1:] + [os.path.join(RECORDINGS_DIR, name) for name in recordings if name.endswith(".jsonl")]
+if not paths:
+    st.write(f"No recordings found in {RECORDINGS_DIR}/. Switch on \"Record turns\" in the main app first.")
+    st.stop()
+
+path = st.sidebar.selectbox("Recording", paths)
+speed = st.sidebar.select_slider("Speed", options=[0.0, 0.5, 1.0, 2.0, 5.0, 10.0], value=1.0, help="0 replays as fast as possible")
+st.sidebar.json(read_metadata(path))
+
+if st.sidebar.button("Replay"):
+    with st.chat_message("assistant"):
+        st_callback = ProgressStreamlitCallbackHandler(parent_container=st.container(), expand_new_thoughts=True, max_thought_containers=10, collapse_completed_thoughts=True)
+        stream_handler = StreamingResponseCallbackHandler(thinking_area=st.empty(), text_area=st.empty())
+        result = replay(path, [stream_handler, st_callback], speed)
+    st.subheader("Handler time")
+    st.metric("Replay time", f"{result['elapsed']:.2f}s")
+    st.table([
+        {"event": method, "calls": stats["calls"], "total ms": round(stats["seconds"] * 1000, 1), "avg ms": round(stats["seconds"] * 1000 / stats["calls"], 3)}
+        for method, stats in sorted(result["handlers"].items(), key=lambda item: -item[1]["seconds"])
+    ])
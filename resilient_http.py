@@ -0,0 +1,147 @@
+"""
+Bounded-latency JSON fetches for flaky upstreams such as bible-api.com.
+
+ResilientFetcher.get_json puts three limits on a GET:
+
+- connect and read timeouts on every request;
+- a hedged second request when the first has not answered after the p95 of the recent
+  latencies, taking whichever answers first;
+- a circuit breaker: after FAILURE_THRESHOLD consecutive failures the upstream is left
+  alone for RESET_SECONDS, and calls are answered from the cache of earlier responses or
+  fail immediately with CircuitOpenError. One trial request then decides whether it
+  closes again.
+
+Responses are cached by URL, so a repeated request can be served while the circuit is open.
+"""
+import concurrent.futures
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any
+
+import requests
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10.0
+# Hedge delay until there are enough latency samples for a p95
+DEFAULT_HEDGE_DELAY = 1.0
+MIN_HEDGE_DELAY = 0.1
+MIN_SAMPLES = 20
+FAILURE_THRESHOLD = 5
+RESET_SECONDS = 30.0
+CACHE_SIZE = 2048
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class UpstreamError(Exception):
+    """A failure that says the upstream is unhealthy: network errors, timeouts, 429 and 5xx responses."""
+
+
+class ResilientFetcher:
+    def __init__(self, session: requests.Session = None, connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT, failure_threshold: int = FAILURE_THRESHOLD, reset_seconds: float = RESET_SECONDS, max_workers: int = 16):
+        self.session = session or requests.Session()
+        self.timeout = (connect_timeout, read_timeout)
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.latencies = deque(maxlen=200)
+        self.cache: OrderedDict = OrderedDict()
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial_running = False
+        self.hedged = 0
+        self.lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="resilient-http")
+
+    def hedge_delay(self) -> float:
+        with self.lock:
+            if len(self.latencies) < MIN_SAMPLES:
+                return DEFAULT_HEDGE_DELAY
+            latencies = sorted(self.latencies)
+        return max(latencies[int(len(latencies) * 0.95) - 1], MIN_HEDGE_DELAY)
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            if self.open_until > time.monotonic():
+                return "open"
+            return "half-open" if self.failures >= self.failure_threshold else "closed"
+
+    def _admit(self) -> bool:
+        """Whether a request may go upstream; in half-open state only one trial request at a time."""
+        with self.lock:
+            if self.open_until > time.monotonic():
+                return False
+            if self.failures >= self.failure_threshold:
+                if self.trial_running:
+                    return False
+                self.trial_running = True
+            return True
+
+    def _record(self, ok: bool, latency: float = None):
+        with self.lock:
+            self.trial_running = False
+            if ok:
+                self.failures = 0
+                if latency is not None:
+                    self.latencies.append(latency)
+            else:
+                self.failures += 1
+                if self.failures >= self.failure_threshold:
+                    self.open_until = time.monotonic() + self.reset_seconds
+
+    def _fetch(self, url: str) -> Any:
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise UpstreamError(f"{type(e).__name__}: {e}") from e
+        if response.status_code == 429 or response.status_code >= 500:
+            raise UpstreamError(f"HTTP {response.status_code} from {url}")
+        response.raise_for_status()  # other 4xx: the request is wrong, the upstream is fine
+        return time.perf_counter() - started, response.json()
+
+    def _cached(self, url: str) -> Any:
+        with self.lock:
+            if url in self.cache:
+                self.cache.move_to_end(url)
+                return self.cache[url]
+        raise CircuitOpenError(f"{url} is unavailable, retrying after {max(self.open_until - time.monotonic(), 0):.0f}s")
+
+    def get_json(self, url: str, cache: bool = True) -> Any:
+        """The JSON of a GET, hedged and within the timeouts; from the cache while the circuit is open."""
+        if not self._admit():
+            return self._cached(url)
+        hedge_delay = self.hedge_delay()
+        deadline = hedge_delay + sum(self.timeout)  # a read timeout bounds each read, this the whole call
+        futures = {self.executor.submit(self._fetch, url)}
+        done, _ = concurrent.futures.wait(futures, timeout=hedge_delay)
+        if not done:
+            with self.lock:
+                self.hedged += 1
+            futures.add(self.executor.submit(self._fetch, url))
+        error = None
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=deadline - hedge_delay):
+                try:
+                    latency, data = future.result()
+                except UpstreamError as e:
+                    error = e
+                    continue
+                except Exception:
+                    self._record(True)
+                    raise
+                self._record(True, latency)
+                if cache:
+                    with self.lock:
+                        self.cache[url] = data
+                        self.cache.move_to_end(url)
+                        if len(self.cache) > CACHE_SIZE:
+                            self.cache.popitem(last=False)
+                return data
+        except concurrent.futures.TimeoutError:
+            error = UpstreamError(f"No answer from {url} within {deadline:.1f}s")
+        self._record(False)
+        raise error
@@ -0,0 +1,155 @@
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# Tools whose results only depend on the date, answers that used other tools are never cached
+CACHEABLE_TOOLS = {
+    "get_liturgy_for_year_and_month_tool",
+    "get_liturgy_explanation_tool",
+    "get_liturgy_for_date_range_tool",
+    "search_ordo_tool",
+    "query_ordo_tool",
+}
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "what", "whats", "which", "who", "for", "of", "on", "in", "to",
+    "me", "please", "can", "could", "you", "tell", "give", "show", "do", "does", "i", "we", "it", "its",
+    "be", "there", "vic", "about", "and", "s",
+}
+
+SYNONYMS = {
+    "colour": "color",
+    "todays": "today",
+    "tomorrows": "tomorrow",
+    "yesterdays": "yesterday",
+    "reading": "readings",
+    "gospels": "gospel",
+    "saints": "saint",
+    "feasts": "feast",
+}
+
+# Words that change which day a question is about; two queries only match if these are equal
+DATE_TERMS = {
+    "today", "tomorrow", "yesterday", "tonight", "week", "month", "year", "next", "last",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "january", "february", "march", "april", "may", "june", "july", "august", "september",
+    "october", "november", "december",
+}
+
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_query(query: str) -> Tuple[str, ...]:
+    """Lowercase, drop punctuation and stopwords and unify spelling variants; returns the remaining words."""
+    words = (SYNONYMS.get(word, word) for word in WORD.findall(query.lower().replace("'", "")))
+    return tuple(word for word in words if word not in STOPWORDS)
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    text = f"  {text} "
+    return frozenset(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def similarity(a: "CacheEntry", b: "CacheEntry") -> float:
+    """Lexical similarity in 0..1: the mean of word Jaccard and character trigram Dice coefficients."""
+    if a.date_terms != b.date_terms:
+        return 0.0
+    words_a, words_b = set(a.words), set(b.words)
+    jaccard = len(words_a & words_b) / len(words_a | words_b) if words_a | words_b else 1.0
+    dice = 2 * len(a.trigrams & b.trigrams) / (len(a.trigrams) + len(b.trigrams)) if a.trigrams or b.trigrams else 1.0
+    return (jaccard + dice) / 2
+
+
+@dataclass
+class CacheEntry:
+    query: str
+    answer: str = ""
+    words: Tuple[str, ...] = ()
+    date_terms: FrozenSet[str] = frozenset()
+    trigrams: FrozenSet[str] = frozenset()
+    created: float = field(default_factory=time.time)
+
+    @classmethod
+    def for_query(cls, query: str, answer: str = "") -> "CacheEntry":
+        words = normalize_query(query)
+        return cls(
+            query=query,
+            answer=answer,
+            words=words,
+            date_terms=frozenset(w for w in words if w in DATE_TERMS or w.isdigit()),
+            trigrams=trigrams(" ".join(words)),
+        )
+
+
+class ResponseCache:
+    """Process-wide cache of final answers, keyed on normalized query, liturgical date and model, shared by all users.
+
+    Near-identical questions ("what are today's readings" / "today's readings?") match through
+    lexical similarity. Entries are scoped to the liturgical date: when a lookup or store happens
+    for a new date, everything cached for earlier dates is dropped.
+    """
+
+    def __init__(self, threshold: float = 0.8, max_entries: int = 500):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._date: Optional[str] = None
+        self._exact: Dict[Tuple[str, Tuple[str, ...]], CacheEntry] = {}
+        self._entries: Dict[str, List[CacheEntry]] = {}
+        self._lock = threading.Lock()
+
+    def _invalidate(self, liturgical_date: str):
+        if self._date != liturgical_date:
+            self._date = liturgical_date
+            self._exact.clear()
+            self._entries.clear()
+
+    def lookup(self, query: str, model: str, liturgical_date: str) -> Optional[str]:
+        """Return the cached answer for a similar query on the same date and model, if any."""
+        probe = CacheEntry.for_query(query)
+        with self._lock:
+            self._invalidate(liturgical_date)
+            entry = self._exact.get((model, probe.words))
+            if entry is None:
+                scored = ((similarity(probe, candidate), candidate) for candidate in self._entries.get(model, []))
+                score, best = max(scored, key=lambda pair: pair[0], default=(0.0, None))
+                entry = best if score >= self.threshold else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.answer
+
+    def store(self, query: str, model: str, liturgical_date: str, answer: str, username: str = None):
+        """Cache an answer for all users; answers that mention the asking user by name are not cached."""
+        entry = CacheEntry.for_query(query, answer)
+        if not entry.words or not answer or mentions_user(answer, username):
+            return
+        with self._lock:
+            self._invalidate(liturgical_date)
+            existing = self._exact.get((model, entry.words))
+            if existing is not None:
+                existing.answer = answer
+                return
+            entries = self._entries.setdefault(model, [])
+            if len(entries) >= self.max_entries:
+                evicted = entries.pop(0)
+                self._exact.pop((model, evicted.words), None)
+            entries.append(entry)
+            self._exact[(model, entry.words)] = entry
+
+
+def mentions_user(answer: str, username: Optional[str]) -> bool:
+    """True when the answer addresses or names the user, e.g. a greeting with the username."""
+    return bool(username) and re.search(rf"\b{re.escape(username)}\b", answer, re.IGNORECASE) is not None
+
+
+def is_cacheable_turn(tool_names: List[str]) -> bool:
+    """A turn may be cached when it called at least one tool and only tools whose results depend on nothing but the date.
+
+    Turns without tool calls are answered from the conversation (follow-ups, small talk) and are never cached.
+    """
+    return bool(tool_names) and all(name in CACHEABLE_TOOLS for name in tool_names)
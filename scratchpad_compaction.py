@@ -0,0 +1,63 @@
+"""
+Compaction of the agent scratchpad between iterations of the tool-calling loop.
+
+Every tool output stays in the agent scratchpad and is resent on each model call of
+the turn. Outputs the model has already seen (all but the most recent step) are
+replaced by a short digest once they are larger than a threshold: long strings inside
+JSON are shortened, so a month of enriched liturgy keeps its dates and celebrations
+but not the Bible texts, and anything else keeps its beginning only.
+"""
+import json
+from typing import Any, List, Sequence, Tuple
+
+from langchain.agents.format_scratchpad.tools import format_to_tool_messages
+from langchain_core.agents import AgentAction
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+# Tool outputs longer than this (in characters) are compacted once they are used
+COMPACTION_THRESHOLD = 4000
+# Characters kept of a compacted output
+DIGEST_CHARS = 1500
+# Characters kept of a string value inside a compacted JSON output
+DIGEST_STRING_CHARS = 80
+# Number of most recent model steps whose tool outputs are always kept verbatim
+KEEP_RECENT_STEPS = 1
+
+
+def _shorten(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > DIGEST_STRING_CHARS:
+        return value[:DIGEST_STRING_CHARS] + "..."
+    if isinstance(value, list):
+        return [_shorten(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _shorten(item) for key, item in value.items()}
+    return value
+
+
+def digest(content: str, name: str = "tool") -> str:
+    """A short stand-in for a tool output the model has already read."""
+    size = f"{len(content)} characters"
+    try:
+        value = json.loads(content)
+        text = json.dumps(_shorten(value), ensure_ascii=False, separators=(",", ":"))
+        if isinstance(value, list):
+            size = f"a list of {len(value)} items, {size}"
+    except (TypeError, ValueError):
+        text = content
+    if len(text) > DIGEST_CHARS:
+        text = text[:DIGEST_CHARS] + "..."
+    return f"{text}\n[compacted {name} result, originally {size}; call the tool again if the omitted details are needed]"
+
+
+def compact_scratchpad(intermediate_steps: Sequence[Tuple[AgentAction, str]]) -> List[BaseMessage]:
+    """Drop-in message_formatter for create_tool_calling_agent that compacts already used tool outputs."""
+    messages = format_to_tool_messages(intermediate_steps)
+    steps = [message for message in messages if isinstance(message, AIMessage)]
+    recent = {call["id"] for message in steps[len(steps) - KEEP_RECENT_STEPS:] for call in message.tool_calls}
+    compacted = []
+    for message in messages:
+        if isinstance(message, ToolMessage) and message.tool_call_id not in recent and isinstance(message.content, str) and len(message.content) > COMPACTION_THRESHOLD:
+            name = message.additional_kwargs.get("name", "tool")
+            message = message.model_copy(update={"content": digest(message.content, name)})
+        compacted.append(message)
+    return compacted
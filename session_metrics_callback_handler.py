@@ -0,0 +1,166 @@
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+@dataclass
+class TurnMetrics:
+    """Latency, token and cost figures for a single agent turn."""
+    model: str = ""
+    started_at: float = field(default_factory=time.perf_counter)
+    first_token_at: Optional[float] = None
+    ended_at: Optional[float] = None
+    llm_calls: int = 0
+    tool_calls: int = 0
+    input_tokens: int = 0  # all input tokens, including cache reads and writes
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    cost: float = 0.0
+    cache_hit: bool = False
+    fast_path: bool = False
+    queue_wait: float = 0.0
+    tool_names: List[str] = field(default_factory=list)
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """Seconds from turn start until the first streamed token."""
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def duration(self) -> float:
+        """Seconds from turn start until the turn ended (or now, while running)."""
+        end = self.ended_at if self.ended_at is not None else time.perf_counter()
+        return end - self.started_at
+
+
+@dataclass
+class SessionMetrics:
+    """Running totals over all turns of a session, updated one turn at a time."""
+    turns: int = 0
+    total_time: float = 0.0
+    total_ttft: float = 0.0
+    ttft_samples: int = 0
+    llm_calls: int = 0
+    tool_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    cost: float = 0.0
+    cache_hits: int = 0
+    fast_paths: int = 0
+    queue_wait: float = 0.0
+
+    def add_turn(self, turn: TurnMetrics) -> None:
+        self.turns += 1
+        self.cache_hits += int(turn.cache_hit)
+        self.fast_paths += int(turn.fast_path)
+        self.total_time += turn.duration
+        if turn.ttft is not None:
+            self.total_ttft += turn.ttft
+            self.ttft_samples += 1
+        self.llm_calls += turn.llm_calls
+        self.tool_calls += turn.tool_calls
+        self.input_tokens += turn.input_tokens
+        self.output_tokens += turn.output_tokens
+        self.cache_read_tokens += turn.cache_read_tokens
+        self.cache_write_tokens += turn.cache_write_tokens
+        self.cost += turn.cost
+        self.queue_wait += turn.queue_wait
+
+    @property
+    def avg_ttft(self) -> Optional[float]:
+        return self.total_ttft / self.ttft_samples if self.ttft_samples else None
+
+
+def estimate_cost(pricing: Dict[str, float], input_tokens: int, output_tokens: int, cache_read_tokens: int = 0, cache_write_tokens: int = 0) -> float:
+    """Estimate the USD cost of a model call from per-million-token prices; input_tokens excludes the cached tokens."""
+    return (
+        input_tokens * pricing.get("input", 0.0)
+        + output_tokens * pricing.get("output", 0.0)
+        + cache_read_tokens * pricing.get("cache_read", 0.0)
+        + cache_write_tokens * pricing.get("cache_write", 0.0)
+    ) / 1_000_000
+
+
+def split_input_tokens(usage: Dict) -> Tuple[int, int, int]:
+    """The uncached input, cache read and cache write tokens of a usage_metadata.
+
+    Depending on the langchain-aws version input_tokens is Bedrock's inputTokens (without the
+    cached tokens, and total_tokens counts them on top) or already includes the cached tokens
+    (and total_tokens is input plus output); the cached tokens must be billed only once.
+    """
+    details = usage.get("input_token_details") or {}
+    input_tokens = usage.get("input_tokens", 0)
+    cache_read = details.get("cache_read", 0) or 0
+    cache_write = details.get("cache_creation", 0) or 0
+    if cache_read + cache_write and usage.get("total_tokens") == input_tokens + usage.get("output_tokens", 0):
+        input_tokens -= cache_read + cache_write
+    return max(input_tokens, 0), cache_read, cache_write
+
+
+class SessionMetricsCallbackHandler(BaseCallbackHandler):
+    """Collects TTFT, turn time, token usage, tool calls and cost for one turn.
+
+    Create one handler per turn and pass it in the invoke callbacks. Usage is read
+    from the ``usage_metadata`` that ChatBedrockConverse attaches to its messages,
+    so the numbers are accumulated as the turn runs instead of re-scanning history.
+    """
+
+    def __init__(self, model: str = "", pricing: Optional[Dict[str, float]] = None, on_update: Optional[Callable[[TurnMetrics], None]] = None):
+        self.turn = TurnMetrics(model=model)
+        self.pricing = pricing or {}
+        self.on_update = on_update
+
+    def _notify(self):
+        if self.on_update:
+            self.on_update(self.turn)
+
+    def on_chat_model_start(self, serialized: dict, messages: list, **kwargs):
+        """Count every model call the agent makes within the turn."""
+        self.turn.llm_calls += 1
+
+    def on_llm_start(self, serialized: dict, prompts: list, **kwargs):
+        self.turn.llm_calls += 1
+
+    def on_llm_new_token(self, token, **kwargs):
+        """Record the time of the first non-empty streamed token."""
+        if self.turn.first_token_at is None and token:
+            self.turn.first_token_at = time.perf_counter()
+
+    def on_llm_end(self, response, **kwargs):
+        """Add the usage metadata of the finished model call to the turn."""
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                input_tokens, cache_read, cache_write = split_input_tokens(usage)
+                output_tokens = usage.get("output_tokens", 0)
+                self.turn.input_tokens += input_tokens + cache_read + cache_write
+                self.turn.output_tokens += output_tokens
+                self.turn.cache_read_tokens += cache_read
+                self.turn.cache_write_tokens += cache_write
+                self.turn.cost += estimate_cost(self.pricing, input_tokens, output_tokens, cache_read, cache_write)
+        self._notify()
+
+    def on_tool_start(self, serialized: dict, input_str: str, **kwargs):
+        self.turn.tool_calls += 1
+        self.turn.tool_names.append(serialized.get("name", ""))
+        self._notify()
+
+    def add_queue_wait(self, seconds: float):
+        """Add the seconds a model call waited for admission by the scheduler."""
+        self.turn.queue_wait += seconds
+        self._notify()
+
+    def finish(self) -> TurnMetrics:
+        """Mark the turn as ended and return its metrics."""
+        if self.turn.ended_at is None:
+            self.turn.ended_at = time.perf_counter()
+        self._notify()
+        return self.turn
@@ -0,0 +1,111 @@
+"""
+Startup profile and warm-up of the app.
+
+profile_imports() imports the heavy modules one after the other in a fresh interpreter
+with `-X importtime` and reports the time each adds, so the cost of a cold start can be
+attributed per module:
+
+    python startup_profiler.py
+
+warm_up() does the first-use work once per process at boot, so the first user of a
+freshly started server does not pay for it: it loads the tools and their indexes, the
+offline Bible corpus and the liturgy artifact, and opens the TLS connections to Bedrock
+and bible-api.com. It returns the seconds each step took for the startup report.
+"""
+import argparse
+import re
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+# Modules imported by main.py, heaviest dependencies first; each is charged only for what it adds
+PROFILED_MODULES = [
+    "boto3",
+    "streamlit",
+    "numpy",
+    "langchain",
+    "langchain_community",
+    "langchain_experimental",
+    "langchain_aws",
+    "tool_catholic_liturgy",
+    "tool_ordo_search",
+    "ordo_columnar",
+    "tools",
+    "claude_bedrock",
+]
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def profile_imports(modules: List[str] = PROFILED_MODULES) -> List[Tuple[str, float]]:
+    """Seconds each module adds to the import time, in import order, measured in a fresh interpreter."""
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match and not match.group(3):  # top-level imports only; they include their dependencies
+            cumulative[match.group(4)] = int(match.group(2)) / 1e6
+    return [(module, cumulative.get(module, 0.0)) for module in modules]
+
+
+def warm_up_bedrock(clients: List) -> None:
+    """Open a TLS connection from every bedrock-runtime client with a cheap request; its answer does not matter."""
+    for client in clients:
+        try:
+            client.list_async_invokes(maxResults=1)
+        except Exception as e:
+            if "Credentials" in type(e).__name__ or "Endpoint" in type(e).__name__:
+                raise
+
+
+def warm_up_indexes() -> None:
+    import liturgy_artifact
+    from bible_corpus import get_corpus
+    from ordo_columnar import ORDO_COLUMNS
+    from tool_ordo_search import ORDO_INDEX
+    get_corpus()
+    liturgy_artifact.get_connection()
+    ORDO_INDEX.search("easter")
+    ORDO_COLUMNS.count(season="Easter")
+
+
+def warm_up(bedrock_clients: List = ()) -> Dict[str, float]:
+    """Run the warm-up steps; returns the seconds per step. A failing step is reported and skipped."""
+    from tool_catholic_liturgy import get_random_verse
+
+    steps: List[Tuple[str, Callable]] = [
+        ("tools", lambda: __import__("tools")),
+        ("indexes", warm_up_indexes),
+        ("bible source", get_random_verse),  # from the offline corpus, or the first request to bible-api.com
+        ("bedrock connections", lambda: warm_up_bedrock(list(bedrock_clients))),
+    ]
+    report = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"Error warming up {name}: {e}")
+        report[name] = time.perf_counter() - started
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the import time per module and the warm-up time per step")
+    parser.add_argument("--no-warm-up", action="store_true", help="only profile the imports")
+    args = parser.parse_args()
+
+    print("import (fresh interpreter)")
+    imports = profile_imports()
+    for module, seconds in imports:
+        print(f"  {module:<24}{seconds:8.3f}s")
+    print(f"  {'total':<24}{sum(seconds for _, seconds in imports):8.3f}s")
+    if not args.no_warm_up:
+        from claude_bedrock import bedrock_client
+        print("warm-up")
+        for name, seconds in warm_up([bedrock_client]).items():
+            print(f"  {name:<24}{seconds:8.3f}s")
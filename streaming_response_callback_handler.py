@@ -7,6 +7,13 @@ class StreamingResponseCallbackHandler(BaseCallbackHandler):
         self.text_area = text_area
         self.text = ""
 
+    def reset(self):
+        """Clear the streamed text, e.g. when a turn is retried on another model."""
+        self.text = ""
+        self.thinking_text = ""
+        self.text_area.empty()
+        self.thinking_area.empty()
+
     def on_llm_new_token(self, token: list[dict], **kwargs):
         """Handle new tokens from the LLM."""
         text_result = ""
@@ -25,4 +32,9 @@ class StreamingResponseCallbackHandler(BaseCallbackHandler):
         self.text += text_result
         self.thinking_text += thinking_result
         self.text_area.markdown(self.text)
-        self.thinking_area.markdown(self.thinking_text, unsafe_allow_html=True)
\ No newline at end of file
+        self.thinking_area.markdown(self.thinking_text, unsafe_allow_html=True)
+
+    def on_text(self, text: str, **kwargs):
+        """Append text that is not streamed by the model, e.g. the note of a turn that stopped early."""
+        self.text += text
+        self.text_area.markdown(self.text)
@@ -0,0 +1,23 @@
+import json
+
+import batch_runner
+
+
+def fake_run_item(item, option, thinking, max_iterations, username):
+    return {"id": item["id"], "prompt": item["prompt"], "status": "ok", "output": "answer", "timing": {"ttft": 0.1, "duration": 0.2}}
+
+
+def test_resume_from_a_truncated_output_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_runner, "run_item", fake_run_item)
+    prompts = tmp_path / "prompts.jsonl"
+    prompts.write_text("".join(json.dumps({"id": str(i), "prompt": f"question {i}"}) + "\n" for i in range(3)))
+    output = tmp_path / "results.jsonl"
+    finished = json.dumps(fake_run_item({"id": "0", "prompt": "question 0"}, None, False, 25, "Batch"))
+    output.write_text(finished + "\n" + finished[:20])  # killed while writing the second record
+
+    summary = batch_runner.run_batch(str(prompts), str(output), concurrency=1)
+    assert summary["ok"] == 2 and summary["skipped"] == 1
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(record["id"] for record in records) == ["0", "1", "2"]
+    assert batch_runner.read_completed_ids(str(output)) == {"0", "1", "2"}
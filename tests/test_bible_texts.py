@@ -0,0 +1,40 @@
+import time
+
+import liturgy_artifact
+import tool_catholic_liturgy
+
+
+def fake_api(monkeypatch, respond):
+    monkeypatch.setattr(tool_catholic_liturgy, "get_local_bible_text", lambda reference: None)
+    monkeypatch.setattr(tool_catholic_liturgy.bible_api, "get_json", respond)
+
+
+def verses_of(url):
+    chapter = 55
+    first, last = (int(part) for part in url.rsplit(":", 1)[1].split("-"))
+    return {"verses": [{"chapter": chapter, "verse": verse, "text": f"v{verse}"} for verse in range(first, last + 1)]}
+
+
+def test_verses_of_one_reading_stay_in_order_across_batches(monkeypatch):
+    def respond(url):
+        if url.endswith(":1-3"):
+            time.sleep(0.2)  # the first batch completes last
+        return verses_of(url)
+
+    fake_api(monkeypatch, respond)
+    monkeypatch.setattr(tool_catholic_liturgy, "BIBLE_API_BATCH_SIZE", 1)
+    texts = tool_catholic_liturgy.get_bible_texts(["Is 55:1-3, 6-9"])
+    assert texts["Is 55:1-3, 6-9"] == "v1 v2 v3 v6 v7 v8 v9"
+
+
+def test_timeouts_and_failures_are_told_apart(monkeypatch):
+    def respond(url):
+        if "Isaiah" in url:
+            time.sleep(1)
+            return verses_of(url)
+        raise RuntimeError("HTTP 404")
+
+    fake_api(monkeypatch, respond)
+    texts = tool_catholic_liturgy.get_bible_texts(["Is 55:1-3", "Mk 1:1-3"], deadline=0.2)
+    assert texts["Is 55:1-3"] == liturgy_artifact.TEXT_TIMED_OUT
+    assert texts["Mk 1:1-3"] == liturgy_artifact.TEXT_UNAVAILABLE
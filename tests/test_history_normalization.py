@@ -0,0 +1,19 @@
+from langchain_community.chat_message_histories import ChatMessageHistory
+
+from history_normalization import QUESTION_KEY, NormalizedWindowMemory
+
+
+def make_memory() -> NormalizedWindowMemory:
+    return NormalizedWindowMemory(chat_memory=ChatMessageHistory(), return_messages=True, memory_key="chat_history", k=500)
+
+
+def test_question_is_saved_instead_of_the_augmented_input():
+    memory = make_memory()
+    memory.save_context({"input": "today's gospel?\n\n[Uploaded documents: notes.pdf]", QUESTION_KEY: "today's gospel?"}, {"output": "Mk 1:1"})
+    assert [message.content for message in memory.chat_memory.messages] == ["today's gospel?", "Mk 1:1"]
+
+
+def test_input_is_saved_without_a_question():
+    memory = make_memory()
+    memory.save_context({"input": "hello"}, {"output": "Hi"})
+    assert memory.chat_memory.messages[0].content == "hello"
@@ -0,0 +1,46 @@
+from datetime import date
+
+import pytest
+
+from intent_fast_path import match_intent
+
+TODAY = date(2025, 3, 14)
+
+
+@pytest.mark.parametrize("query", [
+    "what is a saint",
+    "what is a solemnity?",
+    "what is a feast",
+    "what is a memorial",
+    "what is a psalm",
+    "what is lectionary cycle",
+    "When is the feast of St. Joseph?",
+    "What is the gospel for Easter Sunday?",
+    "readings for christmas",
+    "Which days read from the gospel of John?",
+])
+def test_questions_without_a_day_go_to_the_agent(query):
+    assert match_intent(query, TODAY) is None
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("today's gospel", "gospel"),
+    ("liturgical color tomorrow", "color"),
+    ("readings for March 19", "readings"),
+    ("Sunday cycle for 2026", "sunday_cycle"),
+    ("sunday cycle this year", "sunday_cycle"),
+])
+def test_named_days_are_answered_directly(query, intent):
+    match = match_intent(query, TODAY)
+    assert match is not None and match.intent == intent and match.direct
+
+
+def test_questions_about_a_named_day_get_the_facts():
+    match = match_intent("explain today's gospel", TODAY)
+    assert match is not None and not match.direct
+    assert "March 14, 2025" in match.answer
+
+
+def test_cycle_follows_the_liturgical_year():
+    assert "cycle **A**" in match_intent("sunday cycle this year", date(2025, 12, 5)).answer
+    assert "cycle **C**" in match_intent("sunday cycle this year", date(2025, 11, 29)).answer
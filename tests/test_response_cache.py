@@ -0,0 +1,29 @@
+from response_cache import ResponseCache, is_cacheable_turn
+
+MODEL = "Sonnet 3.7:1.0"
+DATE = "2025-03-14"
+
+
+def test_paraphrase_of_another_user_hits_the_cache():
+    cache = ResponseCache()
+    cache.store("What are today's readings?", MODEL, DATE, "Jer 11:18-20; Jn 7:40-53", username="Dennis")
+    assert cache.lookup("todays readings", MODEL, DATE) == "Jer 11:18-20; Jn 7:40-53"
+
+
+def test_entries_are_scoped_to_date_and_model():
+    cache = ResponseCache()
+    cache.store("What are today's readings?", MODEL, DATE, "Jer 11:18-20")
+    assert cache.lookup("What are today's readings?", "Sonnet 3.5", DATE) is None
+    assert cache.lookup("What are today's readings?", MODEL, "2025-03-15") is None
+
+
+def test_answers_naming_the_user_are_not_cached():
+    cache = ResponseCache()
+    cache.store("What are today's readings?", MODEL, DATE, "Hi Dennis, the readings are Jer 11:18-20.", username="Dennis")
+    assert cache.lookup("What are today's readings?", MODEL, DATE) is None
+
+
+def test_only_turns_with_date_only_tools_are_cacheable():
+    assert not is_cacheable_turn([])
+    assert is_cacheable_turn(["get_liturgy_for_date_range_tool"])
+    assert not is_cacheable_turn(["get_liturgy_for_date_range_tool", "terminal"])
@@ -0,0 +1,34 @@
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from session_metrics_callback_handler import SessionMetricsCallbackHandler
+
+PRICING = {"input": 3.0, "output": 15.0, "cache_read": 0.30, "cache_write": 3.75}
+# 1000 uncached input tokens, 8000 read from and 2000 written to the prompt cache, 500 output tokens
+EXPECTED_COST = (1000 * 3.0 + 500 * 15.0 + 8000 * 0.30 + 2000 * 3.75) / 1_000_000
+
+
+def finish_call(usage: dict) -> SessionMetricsCallbackHandler:
+    handler = SessionMetricsCallbackHandler(model="Sonnet 3.7:1.0", pricing=PRICING)
+    message = AIMessage(content="answer", usage_metadata=usage)
+    handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]))
+    return handler
+
+
+@pytest.mark.parametrize("usage", [
+    # input_tokens without the cached tokens, as Bedrock reports inputTokens
+    {"input_tokens": 1000, "output_tokens": 500, "total_tokens": 11500, "input_token_details": {"cache_read": 8000, "cache_creation": 2000}},
+    # input_tokens including the cached tokens, the LangChain convention
+    {"input_tokens": 11000, "output_tokens": 500, "total_tokens": 11500, "input_token_details": {"cache_read": 8000, "cache_creation": 2000}},
+])
+def test_cached_tokens_are_billed_once(usage):
+    turn = finish_call(usage).turn
+    assert turn.cost == pytest.approx(EXPECTED_COST)
+    assert turn.input_tokens == 11000
+    assert turn.cache_read_tokens == 8000 and turn.cache_write_tokens == 2000
+
+
+def test_usage_without_cache():
+    turn = finish_call({"input_tokens": 1000, "output_tokens": 500, "total_tokens": 1500}).turn
+    assert turn.cost == pytest.approx((1000 * 3.0 + 500 * 15.0) / 1_000_000)
@@ -0,0 +1,35 @@
+import re
+from model_router import estimate_complexity
+from claude_bedrock import THINKING_BUDGET_TOKENS
+
+# Budget for multi-step questions that are likely to need several tool calls
+THINKING_BUDGET_LARGE = 4096
+
+CONVERSATIONAL = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|ok(ay)?|yes|no|sure|great|cool|bye|goodbye|good (morning|afternoon|evening|night)|"
+    r"how are you|who are you|what('s| is) your name)\b",
+    re.IGNORECASE,
+)
+
+MULTI_STEP = re.compile(
+    r"\b(and then|step by step|for each|every|all (the )?(days|sundays|feasts)|compare|calculate|compute|"
+    r"write\b.{0,20}\b(code|script|program)|run|fetch|download|month|week|between)\b",
+    re.IGNORECASE,
+)
+
+
+def choose_thinking_budget(query: str) -> int:
+    """
+    Picks the extended thinking budget for a turn, 0 turns thinking off.
+    Short conversational turns get no thinking, multi-step tool questions a large budget
+    and everything else the default budget.
+    """
+    words = len(query.split())
+    if CONVERSATIONAL.match(query) and words <= 8:
+        return 0
+    complexity = estimate_complexity(query)
+    if complexity < 0.15 and words <= 12:
+        return 0
+    if complexity >= 0.5 or len(MULTI_STEP.findall(query)) >= 2:
+        return THINKING_BUDGET_LARGE
+    return THINKING_BUDGET_TOKENS
@@ -1,9 +1,18 @@
-from datetime import datetime
-from typing import List, Dict, Optional
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 from langchain_core.tools import tool
 import concurrent.futures
 import requests
 import json
+import time
+import liturgy_artifact
+from tool_progress import TOOL_DEADLINE_SECONDS, report_progress
+from resilient_http import ResilientFetcher
+from bible_corpus import get_corpus
+from bible_reference import BOOK_MAP, parse_reference, merge_ranges, format_ranges, group_by_book
 
 LITURGY_DESCRIPTION="""
 # The Liturgy
@@ -598,45 +607,42 @@ The New Testament is central to the **faith, liturgy, and teachings of the Catho
 with open("2025_ordo.json", "r", encoding="utf-8") as f:
     ORDO_2025 = json.load(f)
 
+# Ordo entries by 'YYYY-MM-DD' date, and the sorted dates for range lookups
+ORDO_BY_DATE = {entry["date"]: entry for entry in ORDO_2025}
+ORDO_DATES = sorted(ORDO_BY_DATE)
+
 # Lookup base liturgy from JSON
 def get_liturgy_for_day_ordo(year: int, month: int, day_of_month: int) -> Optional[Dict]:
-    date_str = f"{year}-{month:02d}-{day_of_month:02d}"
-    for entry in ORDO_2025:
-        if entry["date"] == date_str:
-            return entry
-    return None
+    return ORDO_BY_DATE.get(f"{year}-{month:02d}-{day_of_month:02d}")
 
 def get_liturgy_for_year_and_month_ordo(year: int, month: int) -> Optional[List[Dict]]:
     month_data = [entry for entry in ORDO_2025 if entry["date"].startswith(f"{year}-{month:02d}")]
     return month_data if month_data else None
 
+def iter_liturgy_range_ordo(start_date: str, end_date: str) -> Iterator[Dict]:
+    """Yield the base ordo entries from start_date to end_date inclusive ('YYYY-MM-DD'), in date order."""
+    for date_str in islice(ORDO_DATES, bisect_left(ORDO_DATES, start_date), bisect_right(ORDO_DATES, end_date)):
+        yield ORDO_BY_DATE[date_str]
+
+# Maximum number of verse ranges fetched in one bible-api.com request
+BIBLE_API_BATCH_SIZE = 10
+# All bible-api.com requests share one session, so its TLS connections are reused (and can be opened at
+# warm-up), and go through timeouts, hedging and a circuit breaker, so a hung upstream cannot stall a turn
+bible_api = ResilientFetcher(requests.Session())
+
 #Helper to normalize Bible references for bible-api.com
+@lru_cache(maxsize=4096)
 def normalize_reference(ref: str) -> str:
-    """Convert shorthand (e.g., 'Nm 6:22-27') to bible-api.com format (e.g., 'Numbers 6:22-27')."""
-    book_map = {
-        "Gn": "Genesis", "Ex": "Exodus", "Lv": "Leviticus", "Nm": "Numbers", "Dt": "Deuteronomy",
-        "Jos": "Joshua", "Jgs": "Judges", "Ru": "Ruth", "1 Sm": "1 Samuel", "2 Sm": "2 Samuel",
-        "1 Kgs": "1 Kings", "2 Kgs": "2 Kings", "1 Chr": "1 Chronicles", "2 Chr": "2 Chronicles",
-        "Ezr": "Ezra", "Neh": "Nehemiah", "Tb": "Tobit", "Jdt": "Judith", "Est": "Esther",
-        "1 Mc": "1 Maccabees", "2 Mc": "2 Maccabees", "Jb": "Job", "Ps": "Psalms", "Prv": "Proverbs",
-        "Eccl": "Ecclesiastes", "Sg": "Song of Solomon", "Wis": "Wisdom", "Sir": "Sirach",
-        "Is": "Isaiah", "Jer": "Jeremiah", "Lam": "Lamentations", "Bar": "Baruch", "Ez": "Ezekiel",
-        "Dn": "Daniel", "Hos": "Hosea", "Jl": "Joel", "Am": "Amos", "Ob": "Obadiah", "Jon": "Jonah",
-        "Mi": "Micah", "Na": "Nahum", "Hb": "Habakkuk", "Zep": "Zephaniah", "Hg": "Haggai",
-        "Zec": "Zechariah", "Mal": "Malachi", "Mt": "Matthew", "Mk": "Mark", "Lk": "Luke",
-        "Jn": "John", "Acts": "Acts", "Rom": "Romans", "1 Cor": "1 Corinthians", "2 Cor": "2 Corinthians",
-        "Gal": "Galatians", "Eph": "Ephesians", "Phil": "Philippians", "Col": "Colossians",
-        "1 Thes": "1 Thessalonians", "2 Thes": "2 Thessalonians", "1 Tm": "1 Timothy",
-        "2 Tm": "2 Timothy", "Ti": "Titus", "Phlm": "Philemon", "Heb": "Hebrews", "Jas": "James",
-        "1 Pt": "1 Peter", "2 Pt": "2 Peter", "1 Jn": "1 John", "2 Jn": "2 John", "3 Jn": "3 John",
-        "Jude": "Jude", "Rv": "Revelation"
-    }
+    """Convert shorthand (e.g., 'Is 55:1-3, 6-9') to bible-api.com format (e.g., 'Isaiah 55:1-3,6-9')."""
+    ranges = parse_reference(ref)
+    if ranges:
+        return format_ranges(ranges).replace(" ", "%20")  # URL-encode spaces
     parts = ref.split()
     book = " ".join(parts[:-1])  # Handle multi-word books like "1 Cor"
     verses = parts[-1]
-    full_book = book_map.get(book, book)  # Fallback to original if not in map
+    full_book = BOOK_MAP.get(book, book)  # Fallback to original if not in map
     return f"{full_book} {verses}".replace(" ", "%20")  # URL-encode spaces
-    
+
 def get_litury_for_today() -> str:
     today = datetime.now()
     return json.dumps(get_liturgy_for_day_ordo(today.year, today.month, today.day))
@@ -645,10 +651,13 @@ def get_random_verse() -> str:
     """
     {"translation":{"identifier":"web","name":"World English Bible","language":"English","language_code":"eng","license":"Public Domain"},"random_verse":{"book_id":"MRK","book":"Mark","chapter":4,"verse":27,"text":"\nand should sleep and rise night and day, and the seed should spring up and grow, though he doesn’t know how.\n\n"}}
     """
+    corpus = get_corpus()
+    if corpus is not None:
+        book, chapter, verse, text = corpus.random_verse()
+        return f"{book} {chapter}:{verse} - {text}"
     url = "https://bible-api.com/data/web/random"
     try:
-        response = requests.get(url)
-        random_verse = response.json()
+        random_verse = bible_api.get_json(url)
         book = random_verse['random_verse']['book']
         chapter = random_verse['random_verse']['chapter']
         verse = random_verse['random_verse']['verse']
@@ -658,10 +667,52 @@ def get_random_verse() -> str:
         print(f"Error fetching random verse: {e}")
         return None
 
+def describe_day(day: Dict) -> str:
+    titles = ", ".join(celebration["title"] for celebration in day.get("celebrations", []))
+    return f"{day['date']} ({day.get('weekday')}): {titles}"
+
+def collect_days(days: Iterator[Dict], total: int, deadline: float = TOOL_DEADLINE_SECONDS) -> Tuple[List[Dict], bool]:
+    """Consume up to `total` days, reporting each as progress; stops early once `deadline` seconds have passed.
+
+    Returns the days and whether all of them were collected.
+    """
+    collected = []
+    started = time.perf_counter()
+    for day in islice(days, total):
+        collected.append(day)
+        report_progress("days", done=len(collected), total=total, partial=[describe_day(day)])
+        if time.perf_counter() - started > deadline and len(collected) < total:
+            return collected, False
+    return collected, True
+
+def partial_result(days: List[Dict], remaining_start: str, end_date: str) -> str:
+    return json.dumps({
+        "days": days,
+        "note": f"Stopped early to answer quickly. Get the remaining days with get_liturgy_for_date_range_tool from {remaining_start} to {end_date}.",
+    })
+
 @tool
 def get_liturgy_for_year_and_month_tool(year: int, month: int) -> str:
-    """Returns enhanced liturgy for a year and month as JSON string."""
-    return json.dumps(get_enhanced_liturgy_for_year_and_month(year, month))
+    """Returns enhanced liturgy for a year and month as JSON string.
+       If fetching the Bible texts takes too long, it returns the days with the texts fetched so far and a note on how to get the rest.
+    """
+    days = get_enhanced_liturgy_for_year_and_month(
+        year, month,
+        on_batch=lambda done, total, book: report_progress("Bible text requests", done=done, total=total, partial=[book]),
+        deadline=TOOL_DEADLINE_SECONDS,
+    )
+    if days is None:
+        return json.dumps(None)
+    timed_out = [day["date"] for day in days if any(reading["text"] == liturgy_artifact.TEXT_TIMED_OUT for reading in day["readings"].values())]
+    unavailable = [day["date"] for day in days if any(reading["text"] == liturgy_artifact.TEXT_UNAVAILABLE for reading in day["readings"].values())]
+    notes = []
+    if timed_out:
+        notes.append(f"Some Bible texts could not be fetched in time. Get them with get_liturgy_for_date_range_tool for the days from {timed_out[0]} to {timed_out[-1]}.")
+    if unavailable:
+        notes.append(f"The Bible texts marked \"{liturgy_artifact.TEXT_UNAVAILABLE}\" could not be fetched (days {', '.join(unavailable)}); fetching them again will not help now.")
+    if notes:
+        return json.dumps({"days": days, "note": " ".join(notes)})
+    return json.dumps(days)
 
 @tool
 def get_liturgy_explanation_tool() -> str:
@@ -686,29 +737,111 @@ def get_summary_of_new_testament_tool() -> str:
 
 # New helper functions
 def get_sunday_cycle(year: int) -> str:
-    """Determine Sunday cycle (A, B, C) for a year."""
-    cycle = (year - 1980) % 3
+    """Determine Sunday cycle (A, B, C) for the liturgical year ending in `year` (2025 is C)."""
+    cycle = (year - 1981) % 3
     return "A" if cycle == 0 else "B" if cycle == 1 else "C"
 
+def get_first_sunday_of_advent(year: int) -> date:
+    """The First Sunday of Advent in `year`: four Sundays before Christmas."""
+    christmas = date(year, 12, 25)
+    return christmas - timedelta(days=christmas.weekday() + 1 + 21)
+
+def get_liturgical_year(day: date) -> int:
+    """The liturgical year `day` belongs to, named after the year it ends in."""
+    return day.year + 1 if day >= get_first_sunday_of_advent(day.year) else day.year
+
 def get_weekday_cycle(year: int) -> str:
-    """Determine weekday cycle (I or II) for a year."""
+    """Determine weekday cycle (I or II) for the liturgical year ending in `year` (2025 is I)."""
     return "I" if year % 2 != 0 else "II"
 
+def get_local_bible_text(reference: str) -> Optional[str]:
+    """Bible text from the precomputed liturgy artifact or the offline corpus, without network access."""
+    precomputed = liturgy_artifact.get_reading_text(reference)
+    if precomputed is not None:
+        return precomputed
+    corpus = get_corpus()
+    ranges = parse_reference(reference)
+    if corpus is not None and ranges:
+        return corpus.get_text(ranges)
+    return None
+
 def get_bible_text(reference: str) -> str:
     """Fetch Bible text for a normalized reference using bible-api.com."""
     if not reference:  # Handle null or empty
         return "No text available"
+    local_text = get_local_bible_text(reference)
+    if local_text is not None:
+        return local_text
     normalized_ref = normalize_reference(reference)
     url = f"https://bible-api.com/{normalized_ref}"
     print(f"Fetching Bible text for: '{url}'")
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise exception for bad status codes
-        data = response.json()
+        data = bible_api.get_json(url)
         return " ".join(verse["text"].strip() for verse in data["verses"])
     except Exception as e:
         print(f"Error fetching Bible text for {reference}: {e}")
-        return "Text unavailable"
+        return liturgy_artifact.TEXT_UNAVAILABLE
+
+def get_bible_texts(references: List[str], on_batch: Callable[[int, int, str], None] = None, deadline: float = None) -> Dict[str, str]:
+    """Fetch Bible texts for many references at once.
+
+    The references are parsed into verse ranges, overlapping and adjacent ranges are merged
+    and every book is fetched with a single bible-api.com request, so verses shared by several
+    readings are only downloaded once. Returns a dict from reference to text.
+    ``on_batch(done, total, book)`` is called as the requests complete; requests still running
+    after ``deadline`` seconds are abandoned and their references get TEXT_TIMED_OUT, while
+    references whose request failed get TEXT_UNAVAILABLE.
+    """
+    texts = {}
+    parsed = {}
+    for reference in set(references):
+        local_text = get_local_bible_text(reference)
+        ranges = parse_reference(reference)
+        if local_text is not None:
+            texts[reference] = local_text
+        elif ranges:
+            parsed[reference] = ranges
+        else:
+            texts[reference] = get_bible_text(reference)
+
+    def fetch_ranges(ranges: List) -> Dict:
+        url = f"https://bible-api.com/{format_ranges(ranges).replace(' ', '%20')}"
+        print(f"Fetching Bible text for: '{url}'")
+        try:
+            return {(verse["chapter"], verse["verse"]): verse["text"].strip() for verse in bible_api.get_json(url)["verses"]}
+        except Exception as e:
+            print(f"Error fetching Bible text for {url}: {e}")
+            return {}
+
+    # one request per book and batch of merged ranges, to keep the URLs short
+    batches = []
+    for book, book_ranges in group_by_book(verse_range for ranges in parsed.values() for verse_range in ranges).items():
+        merged = merge_ranges(book_ranges)
+        batches.extend((book, merged[i:i + BIBLE_API_BATCH_SIZE]) for i in range(0, len(merged), BIBLE_API_BATCH_SIZE))
+    verses = {}
+    timed_out_books = set()
+    executor = concurrent.futures.ThreadPoolExecutor()
+    futures = {executor.submit(fetch_ranges, batch): book for book, batch in batches}
+    try:
+        for done, future in enumerate(concurrent.futures.as_completed(futures, timeout=deadline), 1):
+            verses.setdefault(futures[future], {}).update(future.result())
+            if on_batch:
+                on_batch(done, len(futures), futures[future])
+    except concurrent.futures.TimeoutError:
+        timed_out_books = {book for future, book in futures.items() if not future.done()}
+        print(f"Fetching Bible texts took longer than {deadline}s, {sum(not future.done() for future in futures)} requests abandoned")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for reference, ranges in parsed.items():
+        book = ranges[0].book
+        # batches complete in any order, so sort the verses back into reading order
+        selected = [text for (chapter, verse), text in sorted(verses.get(book, {}).items()) if any(r.contains(book, chapter, verse) for r in ranges)]
+        if selected:
+            texts[reference] = " ".join(selected)
+        else:
+            texts[reference] = liturgy_artifact.TEXT_TIMED_OUT if book in timed_out_books else liturgy_artifact.TEXT_UNAVAILABLE
+    return texts
 
 def get_readings_for_date(date_str: str, liturgy_data: Dict = None) -> Dict:
     """Fetch readings for a specific date from ordo_2025.json and enrich with Bible text.
@@ -739,31 +872,67 @@ def get_saint_for_date(liturgy_data: Dict) -> str:
 # Enhanced day function
 def get_enhanced_liturgy_for_day(year: int, month: int, day_of_month: int) -> Optional[Dict]:
     """Fetch liturgy for a day with readings and saint."""
-    liturgy = get_liturgy_for_day_ordo(year, month, day_of_month)   
-    print(liturgy) 
+    date_str = f"{year}-{month:02d}-{day_of_month:02d}"
+    precomputed = liturgy_artifact.get_enriched_day(date_str)
+    if precomputed is not None:
+        return precomputed
+    liturgy = get_liturgy_for_day_ordo(year, month, day_of_month)
     if not liturgy:
         return None
-    date_str = f"{year}-{month:02d}-{day_of_month:02d}"
+    liturgy = dict(liturgy)  # do not overwrite the readings references in ORDO_2025
     liturgy["readings"] = get_readings_for_date(date_str, liturgy)
     liturgy["saint"] = get_saint_for_date(liturgy)
     return liturgy
 
 # Enhanced month function with concurrency
-def get_enhanced_liturgy_for_year_and_month(year: int, month: int) -> Optional[List[Dict]]:
-    """Fetch enhanced liturgy for a month with parallel API calls."""
+def get_enhanced_liturgy_for_year_and_month(year: int, month: int, on_batch: Callable[[int, int, str], None] = None, deadline: float = None) -> Optional[List[Dict]]:
+    """Fetch enhanced liturgy for a month with parallel API calls (see get_bible_texts for on_batch and deadline)."""
+    precomputed = liturgy_artifact.get_enriched_month(year, month)
+    if precomputed is not None:
+        return precomputed
     base_liturgy = get_liturgy_for_year_and_month_ordo(year, month)
     if not base_liturgy:
         return None
+    references = [day["readings"].get(key) for day in base_liturgy for key in liturgy_artifact.READING_KEYS]
+    texts = get_bible_texts([reference for reference in references if reference], on_batch=on_batch, deadline=deadline)
+    return [liturgy_artifact.enrich_day(day, texts) for day in base_liturgy]
 
-    def enhance_day(day_data: Dict) -> Dict:
-        date = datetime.strptime(day_data["date"], "%Y-%m-%d")
-        enhanced = get_enhanced_liturgy_for_day(date.year, date.month, date.day)
-        return enhanced if enhanced else day_data
+# Lazy range function, enriching a few days at a time
+def iter_enhanced_liturgy_range(start_date: str, end_date: str, chunk_size: int = 7) -> Iterator[Dict]:
+    """Yield enhanced liturgy from start_date to end_date inclusive ('YYYY-MM-DD').
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        enhanced_liturgy = list(executor.map(enhance_day, base_liturgy))
-    
-    return enhanced_liturgy
+    Days are enriched in chunks as the caller consumes them, so a caller that stops
+    after a few days only pays for those, however long the span is.
+    """
+    days = iter_liturgy_range_ordo(start_date, end_date)
+    while True:
+        chunk = list(islice(days, chunk_size))
+        if not chunk:
+            return
+        enriched = {day["date"]: liturgy_artifact.get_enriched_day(day["date"]) for day in chunk}
+        missing = [day for day in chunk if enriched[day["date"]] is None]
+        if missing:
+            references = [day["readings"].get(key) for day in missing for key in liturgy_artifact.READING_KEYS]
+            texts = get_bible_texts([reference for reference in references if reference])
+            for day in missing:
+                enriched[day["date"]] = liturgy_artifact.enrich_day(day, texts)
+        for day in chunk:
+            yield enriched[day["date"]]
+
+@tool
+def get_liturgy_for_date_range_tool(start_date: str, end_date: str, limit: int = 7, with_texts: bool = True) -> str:
+    """Returns the liturgy for the days from start_date to end_date inclusive as JSON string.
+       Dates are 'YYYY-MM-DD'. Use it for a week, a season or "the next 40 days".
+       At most `limit` days are returned; set with_texts=False to get only the references
+       (much faster and smaller, e.g. to list celebrations over a long span).
+    """
+    if not with_texts:
+        return json.dumps(list(islice(iter_liturgy_range_ordo(start_date, end_date), max(limit, 0))))
+    total = min(max(limit, 0), sum(1 for _ in iter_liturgy_range_ordo(start_date, end_date)))
+    days, complete = collect_days(iter_enhanced_liturgy_range(start_date, end_date, chunk_size=min(max(limit, 1), 7)), total)
+    if not complete:
+        return partial_result(days, ORDO_DATES[bisect_right(ORDO_DATES, days[-1]["date"])], end_date)
+    return json.dumps(days)
 
 # Updated function to match your example
 def get_gospel_and_readings_for_year_and_month_and_day_of_month(year: int, month: int, day_of_month: int) -> Optional[str]:
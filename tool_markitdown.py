@@ -1,10 +1,128 @@
-from markitdown import MarkItDown
+"""
+Document conversion tools: PDF, Word, PowerPoint, Excel, HTML and other files to markdown
+with MarkItDown.
 
-# Create an instance
-md = MarkItDown()
+Conversions run in a process pool with a timeout, so a large or broken document cannot
+block the agent. The markdown is cached by file content hash and split into chunks that
+the agent reads one at a time, so asking again about the same document costs nothing.
+"""
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import re
+from typing import Dict, List
 
-# Convert a file to Markdown
-# result = md.convert("2025cal.pdf")  # Replace with your file path
-# save to a file
-# with open("2025cal.md", "w") as f:
-#     f.write(result.text_content)
+from langchain_core.tools import tool
+from content_hash_cache import ContentHashCache, sha256_file
+
+CONVERSION_TIMEOUT = int(os.environ.get("CONVERSION_TIMEOUT", 120))
+CONVERSION_WORKERS = int(os.environ.get("CONVERSION_WORKERS", 2))
+# Target size of a chunk in characters; chunks break at headings or paragraphs
+CHUNK_CHARS = 4000
+
+DOCUMENT_ID = re.compile(r"[0-9a-f]{16}")
+HEADING = re.compile(r"^#{1,6}\s+(.+)$", re.MULTILINE)
+
+document_cache = ContentHashCache("documents")
+_pool = None
+
+
+def convert_file(path: str) -> str:
+    """Markdown of a file; runs in a worker process."""
+    from markitdown import MarkItDown
+    return MarkItDown().convert(path).text_content
+
+
+def get_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = concurrent.futures.ProcessPoolExecutor(max_workers=CONVERSION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def reset_pool():
+    """Replace the pool after a timeout; its workers may still be busy with the stuck conversion."""
+    global _pool
+    if _pool is not None:
+        for process in list(_pool._processes.values()):  # the executor has no public way to stop a running task
+            process.terminate()
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def split_chunks(markdown: str, size: int = CHUNK_CHARS) -> List[str]:
+    """Split markdown into chunks of about `size` characters, preferring heading and paragraph boundaries."""
+    chunks: List[str] = []
+    current = ""
+    for block in re.split(r"\n(?=#{1,6}\s)|\n\s*\n", markdown):
+        block = block.strip()
+        if not block:
+            continue
+        while len(block) > size:  # a single block larger than a chunk, e.g. a long table
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(block[:size])
+            block = block[size:]
+        if current and (len(current) + len(block) > size or (HEADING.match(block) and len(current) > size // 2)):
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{block}" if current else block
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_title(chunk: str) -> str:
+    match = HEADING.search(chunk)
+    return (match.group(1) if match else chunk.split("\n", 1)[0])[:80]
+
+
+def convert_document(path: str) -> Dict:
+    """The cached conversion of a file, converting it first when its content is new."""
+    document_id = sha256_file(path)[:16]
+    document = document_cache.get(document_id)
+    if document is None:
+        future = get_pool().submit(convert_file, path)
+        try:
+            markdown = future.result(timeout=CONVERSION_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            reset_pool()
+            raise TimeoutError(f"Converting {os.path.basename(path)} took longer than {CONVERSION_TIMEOUT}s")
+        document = {"document_id": document_id, "source": os.path.basename(path), "characters": len(markdown), "chunks": split_chunks(markdown)}
+        document_cache.put(document_id, document)
+    return document
+
+
+def describe_document(document: Dict) -> Dict:
+    return {
+        "document_id": document["document_id"],
+        "source": document["source"],
+        "characters": document["characters"],
+        "chunks": [{"chunk": index, "title": chunk_title(chunk)} for index, chunk in enumerate(document["chunks"])],
+    }
+
+
+@tool
+def convert_document_tool(path: str) -> str:
+    """Convert a document (PDF, Word, PowerPoint, Excel, HTML, CSV, ...) at a local path to markdown.
+       Returns the document_id and an outline of its chunks as JSON, not the text itself;
+       read the chunks you need with read_document_chunk_tool.
+    """
+    try:
+        return json.dumps(describe_document(convert_document(path)), ensure_ascii=False)
+    except Exception as e:
+        print(f"Error converting {path}: {e}")
+        return json.dumps({"error": f"{type(e).__name__}: {e}"})
+
+
+@tool
+def read_document_chunk_tool(document_id: str, chunk: int) -> str:
+    """Return one chunk (0-based) of the markdown of a document converted with convert_document_tool."""
+    document = document_cache.get(document_id) if DOCUMENT_ID.fullmatch(document_id) else None
+    if document is None:
+        return f"Unknown document_id {document_id}, convert the document first"
+    if not 0 <= chunk < len(document["chunks"]):
+        return f"Chunk {chunk} does not exist, {document['source']} has {len(document['chunks'])} chunks"
+    return f"[{document['source']}, chunk {chunk} of {len(document['chunks'])}]\n\n{document['chunks'][chunk]}"
@@ -0,0 +1,107 @@
+import json
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List, Set
+from langchain_core.tools import tool
+from tool_catholic_liturgy import ORDO_2025
+from bible_reference import BOOK_MAP, parse_reference
+
+MONTHS = ["january", "february", "march", "april", "may", "june", "july", "august", "september", "october", "november", "december"]
+WEEKDAYS = {"mon": "monday", "tue": "tuesday", "wed": "wednesday", "thu": "thursday", "fri": "friday", "sat": "saturday", "sun": "sunday"}
+
+STOPWORDS = {
+    "a", "an", "the", "of", "and", "or", "in", "on", "at", "to", "for", "is", "are", "when", "which", "what",
+    "days", "day", "date", "dates", "read", "reading", "readings", "from", "with", "does", "do", "we", "there",
+    "celebrate", "celebrated", "celebration", "liturgy", "2025", "all", "list", "show", "me", "find",
+}
+
+SYNONYMS = {"st": "saint", "sts": "saint", "saints": "saint", "our": "", "lady": "mary", "purple": "violet", "colour": "color"}
+
+# Multi-word book names and abbreviations ('1 Cor', '1 Corinthians') become one token ('1corinthians')
+_MULTI_WORD_BOOKS = sorted({name for pair in BOOK_MAP.items() for name in pair if " " in name}, key=len, reverse=True)
+MULTI_WORD_BOOK_PATTERN = re.compile(r"\b(" + "|".join(re.escape(name.lower()) for name in _MULTI_WORD_BOOKS) + r")\b")
+BOOK_ALIASES = {name.lower().replace(" ", ""): full.lower().replace(" ", "") for abbreviation, full in BOOK_MAP.items() for name in (abbreviation, full)}
+
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words with stopwords removed, synonyms unified and a naive plural stem (not for book names)."""
+    text = MULTI_WORD_BOOK_PATTERN.sub(lambda match: match.group(1).replace(" ", ""), text.lower().replace("'s", ""))
+    tokens = []
+    for word in WORD.findall(text):
+        word = SYNONYMS.get(word, word)
+        if not word or word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss") and word not in BOOK_ALIASES:
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def index_terms(entry: Dict) -> Set[str]:
+    """All search terms of an ordo day: titles, ranks, saint, season, color, weekday, month and reading books."""
+    terms = set()
+    for celebration in entry.get("celebrations", []):
+        terms.update(tokenize(celebration.get("title") or ""))
+        terms.update(tokenize(celebration.get("rank") or ""))
+    terms.update(tokenize(entry.get("saint") or ""))
+    terms.update(tokenize(entry.get("season") or ""))
+    terms.update(tokenize(entry.get("color") or ""))
+    terms.update(tokenize(WEEKDAYS.get(entry.get("weekday"), "")))
+    terms.add(MONTHS[int(entry["date"][5:7]) - 1])
+    for reference in entry.get("readings", {}).values():
+        for verse_range in parse_reference(reference) or ():
+            terms.add(verse_range.book.lower().replace(" ", ""))
+    return terms
+
+
+class OrdoIndex:
+    """Inverted index from search terms to ordo days, built once at load time."""
+
+    def __init__(self, ordo: List[Dict]):
+        self.ordo = ordo
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        for position, entry in enumerate(ordo):
+            for term in index_terms(entry):
+                self.postings[term].add(position)
+
+    def idf(self, term: str) -> float:
+        return math.log((1 + len(self.ordo)) / (1 + len(self.postings.get(term, ()))))
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Days matching any query term, best idf-weighted overlap first (days matching all terms lead)."""
+        terms = [BOOK_ALIASES.get(term, term) for term in tokenize(query)]
+        scores = defaultdict(float)
+        for term in dict.fromkeys(terms):
+            weight = self.idf(term)
+            for position in self.postings.get(term, ()):
+                scores[position] += weight
+        ranked = sorted(scores, key=lambda position: (-scores[position], position))
+        return [self.summarize(self.ordo[position]) for position in ranked[:limit]]
+
+    @staticmethod
+    def summarize(entry: Dict) -> Dict:
+        return {
+            "date": entry["date"],
+            "weekday": entry["weekday"],
+            "celebrations": entry["celebrations"],
+            "season": entry["season"],
+            "color": entry["color"],
+            "readings": entry["readings"],
+        }
+
+
+ORDO_INDEX = OrdoIndex(ORDO_2025)
+
+
+@tool
+def search_ordo_tool(query: str, limit: int = 20) -> str:
+    """Search the 2025 liturgical calendar (ordo) and return the matching days as a JSON list.
+       Matches celebration titles, ranks (solemnity, feast, memorial, optional memorial, sunday, weekday),
+       saints, seasons, liturgical colors, weekdays, months and the Bible books of the readings.
+       Examples: "St. Joseph", "Isaiah", "solemnity", "red Easter", "memorial saturday".
+       Use this instead of fetching month after month to find when something is celebrated or read.
+    """
+    return json.dumps(ORDO_INDEX.search(query, limit))
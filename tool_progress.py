@@ -0,0 +1,23 @@
+"""
+Progress events from long-running tools.
+
+A tool calls report_progress while it works; the event goes through the callback system
+as a custom event of the running tool, so any handler can show it as it arrives (see
+ProgressStreamlitCallbackHandler). Called outside of an agent run it does nothing.
+"""
+import os
+from typing import Any, List
+
+from langchain_core.callbacks import dispatch_custom_event
+
+PROGRESS_EVENT = "tool_progress"
+# Seconds after which the liturgy tools return the days they have so far
+TOOL_DEADLINE_SECONDS = float(os.environ.get("LITURGY_TOOL_DEADLINE", 30))
+
+
+def report_progress(message: str, done: int = None, total: int = None, partial: List[Any] = None) -> None:
+    """Send a progress event: a message, the units done out of total, and the new partial results."""
+    try:
+        dispatch_custom_event(PROGRESS_EVENT, {"message": message, "done": done, "total": total, "partial": partial or []})
+    except RuntimeError:  # not inside a run, e.g. a tool function called directly
+        pass
@@ -0,0 +1,78 @@
+"""
+Per-turn selection of the tools bound to the model.
+
+Binding every tool adds all their JSON schemas to every model call, and the shell,
+Python REPL and the five HTTP request tools are rarely needed. select_tools picks tool
+groups for a turn with a few keyword patterns over the question, plus the groups of the
+tools used in the previous turn (so follow-ups like "and the month after?" keep their
+tools) and the document tools while documents are uploaded. When no group matches, the
+liturgy tools are bound, since that is what most questions are about.
+
+The tool list of every combination of groups is built once and cached.
+"""
+import re
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List
+
+from langchain_core.tools import BaseTool
+
+from tools import tools as ALL_TOOLS
+
+TOOL_GROUPS = {
+    "liturgy": ["get_liturgy_for_year_and_month_tool", "get_liturgy_for_date_range_tool", "get_liturgy_explanation_tool", "search_ordo_tool", "query_ordo_tool"],
+    "documents": ["convert_document_tool", "read_document_chunk_tool"],
+    "code": ["Python_REPL", "terminal"],
+    "web": ["requests_get"],
+    "web_write": ["requests_post", "requests_put", "requests_patch", "requests_delete"],
+}
+DEFAULT_GROUPS = frozenset({"liturgy"})
+
+GROUP_PATTERNS = {
+    "liturgy": re.compile(
+        r"\b(gospel|readings?|psalm|liturg\w*|ordo|feasts?|saints?|st|solemnit\w*|memorial|lent\w*|advent|easter|christmas|"
+        r"pentecost|ordinary time|season|colou?rs?|vestments?|sundays?|mass|calendar|celebrat\w*|bible|verses?|scriptures?|"
+        r"cycle|holy day|today|tomorrow|yesterday|week|month|"
+        r"january|february|march|april|may|june|july|august|september|october|november|december)\b",
+        re.IGNORECASE,
+    ),
+    "documents": re.compile(r"\b(documents?|pdfs?|files?|upload\w*|docx?|pptx?|xlsx?|spreadsheets?|slides?|attachments?|chunks?)\b", re.IGNORECASE),
+    "code": re.compile(
+        r"\b(python|scripts?|code|program|calculat\w*|comput\w*|plot|run|execute|shell|terminal|command|bash|install|directory|folder)\b|\d\s*[+*/^%]\s*\d|\d\s+-\s+\d",
+        re.IGNORECASE,
+    ),
+    "web": re.compile(r"https?://|\b(url|websites?|web ?pages?|api|endpoints?|download|fetch|http|curl|online)\b", re.IGNORECASE),
+    "web_write": re.compile(r"\b(post|put|patch|delete)\b.{0,40}\b(requests?|api|endpoints?|url|https?)\b|\bwebhooks?\b", re.IGNORECASE),
+}
+
+TOOL_GROUP = {name: group for group, names in TOOL_GROUPS.items() for name in names}
+
+
+def classify(query: str) -> FrozenSet[str]:
+    """The tool groups the question itself calls for."""
+    groups = {group for group, pattern in GROUP_PATTERNS.items() if pattern.search(query)}
+    if "web_write" in groups:
+        groups.add("web")
+    return frozenset(groups)
+
+
+def select_groups(query: str, previous_tool_names: Iterable[str] = (), has_documents: bool = False) -> FrozenSet[str]:
+    """The tool groups for a turn: from the question, the tools of the previous turn and uploaded documents."""
+    groups = set(classify(query))
+    groups.update(TOOL_GROUP[name] for name in previous_tool_names if name in TOOL_GROUP)
+    if has_documents:
+        groups.add("documents")
+    return frozenset(groups) or DEFAULT_GROUPS
+
+
+@lru_cache(maxsize=None)
+def tools_named(names: FrozenSet[str]) -> List[BaseTool]:
+    """The tools with these names, in the order of tools.py; built once per combination."""
+    return [tool for tool in ALL_TOOLS if tool.name in names]
+
+
+def tools_for_groups(groups: FrozenSet[str]) -> List[BaseTool]:
+    return tools_named(frozenset(name for group in groups for name in TOOL_GROUPS[group]))
+
+
+def select_tools(query: str, previous_tool_names: Iterable[str] = (), has_documents: bool = False) -> List[BaseTool]:
+    return tools_for_groups(select_groups(query, previous_tool_names, has_documents))
@@ -3,9 +3,12 @@ from tool_get_time import get_current_time
 from tool_shell import shell_tool
 from tool_requests import requests_toolkit
 from tool_repl import python_tool
-from tool_catholic_liturgy import get_liturgy_for_year_and_month_tool, get_liturgy_explanation_tool
+from tool_catholic_liturgy import get_liturgy_for_year_and_month_tool, get_liturgy_explanation_tool, get_liturgy_for_date_range_tool
+from tool_ordo_search import search_ordo_tool
+from ordo_columnar import query_ordo_tool
+from tool_markitdown import convert_document_tool, read_document_chunk_tool
 
 # Add all tools to the tools list
-tools = [shell_tool, python_tool, get_liturgy_for_year_and_month_tool, get_liturgy_explanation_tool]
+tools = [shell_tool, python_tool, get_liturgy_for_year_and_month_tool, get_liturgy_explanation_tool, get_liturgy_for_date_range_tool, search_ordo_tool, query_ordo_tool, convert_document_tool, read_document_chunk_tool]
 # Extend the tools list with the toolkit's tools
 tools.extend(requests_toolkit.get_tools())
@@ -0,0 +1,140 @@
+"""
+Cancellation and per-turn budgets for the agent loop.
+
+A TurnController is passed as a callback handler of the turn and to the agent executor.
+Budgets for wall-clock time, total tokens and tool calls are checked between agent
+steps; cancellation (and running out of time) also interrupts a streaming model call or
+the next tool call. Either way the turn ends with a partial answer instead of an error.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentFinish
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Characters of each tool result quoted in a partial answer
+PARTIAL_RESULT_CHARS = 300
+
+
+@dataclass
+class TurnBudget:
+    """Limits for one turn; None means unlimited."""
+    max_seconds: Optional[float] = None
+    max_tokens: Optional[int] = None
+    max_tool_calls: Optional[int] = None
+
+
+class TurnStopped(Exception):
+    """Raised from a callback to interrupt a model stream or tool call."""
+
+
+class TurnController(BaseCallbackHandler):
+    """Tracks the usage of a turn against its budget and carries the cancel signal.
+
+    ``cancel_event`` can be any object with ``set``/``is_set``, e.g. a manager Event
+    shared with a worker process.
+    """
+
+    raise_error = True  # let TurnStopped escape the callback manager
+
+    def __init__(self, budget: Optional[TurnBudget] = None, cancel_event=None):
+        self.budget = budget or TurnBudget()
+        self.cancel_event = cancel_event or threading.Event()
+        self.started_at = time.perf_counter()
+        self.tokens = 0
+        self.tool_calls = 0
+        self.text = ""  # answer text streamed by the current model call
+        self.tool_results: List[Tuple[str, str]] = []
+        self.stop_reason: Optional[str] = None
+        self.interrupted = False  # the agent loop was actually cut short
+        self._tool_name = ""
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check(self) -> Optional[str]:
+        """The reason the turn has to stop, or None while it is within budget."""
+        if self.stop_reason is None:
+            budget = self.budget
+            if self.cancelled:
+                self.stop_reason = "stopped by the user"
+            elif budget.max_seconds is not None and time.perf_counter() - self.started_at >= budget.max_seconds:
+                self.stop_reason = f"time budget of {budget.max_seconds:g}s reached"
+            elif budget.max_tokens is not None and self.tokens >= budget.max_tokens:
+                self.stop_reason = f"token budget of {budget.max_tokens} reached"
+            elif budget.max_tool_calls is not None and self.tool_calls >= budget.max_tool_calls:
+                self.stop_reason = f"tool call budget of {budget.max_tool_calls} reached"
+        return self.stop_reason
+
+    def _interrupt_if_stopped(self):
+        """Cancellation and the time budget interrupt at once; token and tool budgets wait for the next step."""
+        reason = self.check()
+        if reason and (self.cancelled or reason.startswith("time")):
+            self.interrupted = True
+            raise TurnStopped(reason)
+
+    def on_chat_model_start(self, serialized: dict, messages: list, **kwargs):
+        self._interrupt_if_stopped()
+        self.text = ""
+
+    def on_llm_new_token(self, token, **kwargs):
+        if isinstance(token, list):
+            self.text += "".join(item.get("text", "") for item in token if isinstance(item, dict) and item.get("type") == "text")
+        elif isinstance(token, str):
+            self.text += token
+        self._interrupt_if_stopped()
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self.tokens += usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+
+    def on_tool_start(self, serialized: dict, input_str: str, **kwargs):
+        self._interrupt_if_stopped()
+        self.tool_calls += 1
+        self._tool_name = serialized.get("name", "")
+
+    def on_tool_end(self, output, **kwargs):
+        self.tool_results.append((self._tool_name, str(getattr(output, "content", output))))
+        self._interrupt_if_stopped()
+
+    def partial_note(self) -> str:
+        """Text appended to the streamed answer when the turn stops early."""
+        note = f"\n\n_Stopped early: {self.stop_reason}._"
+        if not self.text.strip() and self.tool_results:
+            results = "\n".join(f"- {name}: {result[:PARTIAL_RESULT_CHARS]}" for name, result in self.tool_results)
+            note += f"\n\nResults gathered so far:\n{results}"
+        return note
+
+
+class BudgetedAgentExecutor(AgentExecutor):
+    """AgentExecutor that stops between steps when the turn controller says so and answers with what it has."""
+
+    controller: Any = None
+
+    def _should_continue(self, iterations: int, time_elapsed: float) -> bool:
+        if self.controller is not None and self.controller.check():
+            self.controller.interrupted = True
+            return False
+        return super()._should_continue(iterations, time_elapsed)
+
+    def _call(self, inputs: Dict[str, str], run_manager=None) -> Dict[str, Any]:
+        try:
+            result = super()._call(inputs, run_manager=run_manager)
+        except TurnStopped:
+            result = None
+        if self.controller is None or not self.controller.interrupted:
+            return result
+        note = self.controller.partial_note()
+        if run_manager:
+            run_manager.on_text(note)
+        return self._return(AgentFinish({"output": self.controller.text + note}, ""), [], run_manager=run_manager)